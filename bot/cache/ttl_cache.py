@@ -1,14 +1,15 @@
 """
 TTL Cache implementation for Doyobi Diary.
 
-This module provides time-to-live caching functionality with automatic cleanup
-and configurable expiration times.
+This module provides time-to-live caching functionality with automatic cleanup,
+configurable expiration times and least-recently-used eviction.
 """
 
 import asyncio
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Hashable, Optional
 
 from bot.utils.cache_manager import get_logger
 
@@ -28,21 +29,25 @@ class CacheEntry:
 
 
 class TTLCache:
-    """Time-to-live cache with automatic cleanup."""
+    """Time-to-live cache with LRU eviction and automatic cleanup."""
     
-    def __init__(self, ttl_seconds: int = 300):
+    def __init__(self, ttl_seconds: int = 300, max_size: int = 10_000):
         """
         Initialize TTL cache.
         
         Args:
             ttl_seconds: Time to live in seconds (default: 5 minutes)
+            max_size: Maximum number of entries before least recently used ones are evicted
         """
         self.ttl_seconds = ttl_seconds
-        self._cache: Dict[str, CacheEntry] = {}
+        self.max_size = max_size
+        self._cache: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
         self._cleanup_task = None
         self._running = False
     
-    async def get(self, key: str, default: Any = None) -> Any:
+    async def get(self, key: Hashable, default: Any = None) -> Any:
         """
         Get value from cache.
         
@@ -56,18 +61,22 @@ class TTLCache:
         entry = self._cache.get(key)
         
         if entry is None:
-            logger.debug(f"Cache miss for key: {key}")
+            self._misses += 1
+            logger.debug("Cache miss for key: %s", key)
             return default
         
         if entry.is_expired():
-            logger.debug(f"Cache expired for key: {key}")
+            self._misses += 1
+            logger.debug("Cache expired for key: %s", key)
             await self.invalidate(key)
             return default
         
-        logger.debug(f"Cache hit for key: {key}")
+        self._hits += 1
+        self._cache.move_to_end(key)
+        logger.debug("Cache hit for key: %s", key)
         return entry.value
     
-    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+    async def set(self, key: Hashable, value: Any, ttl: Optional[int] = None) -> None:
         """
         Set value in cache.
         
@@ -86,13 +95,19 @@ class TTLCache:
         )
         
         self._cache[key] = entry
-        logger.debug(f"Cache set for key: {key}, TTL: {ttl_to_use}s")
+        self._cache.move_to_end(key)
+        
+        # Evict least recently used entries once over capacity
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        
+        logger.debug("Cache set for key: %s, TTL: %ss", key, ttl_to_use)
         
         # Start cleanup task if not already running
         if not self._running:
             await self._start_cleanup_task()
     
-    async def invalidate(self, key: str) -> bool:
+    async def invalidate(self, key: Hashable) -> bool:
         """
         Remove key from cache.
         
@@ -104,7 +119,7 @@ class TTLCache:
         """
         if key in self._cache:
             del self._cache[key]
-            logger.debug(f"Cache invalidated for key: {key}")
+            logger.debug("Cache invalidated for key: %s", key)
             return True
         return False
     
@@ -148,12 +163,16 @@ class TTLCache:
             if entry.expires_at <= now
         )
         active_entries = total_entries - expired_entries
+        lookups = self._hits + self._misses
         
         return {
             "total_entries": total_entries,
             "active_entries": active_entries,
             "expired_entries": expired_entries,
-            "hit_rate": getattr(self, '_hit_rate', 0.0),
+            "max_size": self.max_size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
             "memory_usage_bytes": self._estimate_memory_usage()
         }
     
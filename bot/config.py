@@ -46,6 +46,9 @@ class Config:
     max_voice_file_size_mb: int = 25
     max_voice_duration_seconds: int = 120
     
+    # Activity Logging Configuration
+    max_activity_length: int = 2000  # characters
+    
     @classmethod
     def from_env(cls) -> "Config":
         """Create configuration from environment variables."""
@@ -89,6 +92,9 @@ class Config:
             whisper_model=os.getenv("WHISPER_MODEL", "whisper-1"),
             max_voice_file_size_mb=int(os.getenv("MAX_VOICE_FILE_SIZE_MB", "25")),
             max_voice_duration_seconds=int(os.getenv("MAX_VOICE_DURATION_SECONDS", "120")),
+            
+            # Activity Logging
+            max_activity_length=int(os.getenv("MAX_ACTIVITY_LENGTH", "2000")),
         )
     
     def validate(self) -> None:
@@ -106,6 +112,10 @@ class Config:
         """Check if admin user is configured."""
         return self.admin_user_id != 0
     
+    def is_admin(self, user_id: int) -> bool:
+        """Check if the given user is the configured admin."""
+        return self.admin_user_id != 0 and user_id == self.admin_user_id
+    
     def is_monitoring_enabled(self) -> bool:
         """Check if monitoring is enabled."""
         return self.sentry_dsn is not None
@@ -2,11 +2,13 @@
 Database operations for Doyobi Diary.
 """
 
+from .activity_batcher import ActivityBatcher
 from .client import DatabaseClient
 from .friend_operations import FriendOperations
 from .user_operations import UserOperations
 
 __all__ = [
+    "ActivityBatcher",
     "DatabaseClient",
     "UserOperations", 
     "FriendOperations"
@@ -0,0 +1,97 @@
+"""
+Batched activity logging.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from monitoring import get_logger
+
+logger = get_logger(__name__)
+
+
+class ActivityBatcher:
+    """
+    Coalesces activity inserts from concurrent handlers into multi-row INSERTs.
+
+    log() waits for its batch so handlers can still tell the user whether the
+    activity was saved; the price is up to flush_interval of extra latency per
+    message, which is small next to the Supabase round trip it replaces.
+    """
+
+    def __init__(self, db_client, max_batch_size: int = 100, flush_interval: float = 0.05):
+        """
+        Initialize activity batcher.
+
+        Args:
+            db_client: Database client
+            max_batch_size: Flush immediately once this many rows are pending
+            flush_interval: Seconds to wait for more rows before flushing
+        """
+        self.db = db_client
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def log(self, user_id: int, activity_text: str, question_id: Optional[int] = None) -> bool:
+        """
+        Queue an activity and wait until its batch is written.
+
+        Returns:
+            True if the batch containing this activity was inserted
+        """
+        activity_data = {
+            "tg_id": user_id,
+            "job_text": activity_text,
+            "jobs_timestamp": "now()"
+        }
+        if question_id is not None:
+            activity_data["question_id"] = question_id
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((activity_data, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+        return await future
+
+    async def flush(self) -> int:
+        """Insert all pending activities in one query; returns rows written."""
+        batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+
+        try:
+            self.db.table("tg_jobs").insert([activity for activity, _ in batch]).execute()
+            logger.debug("Activity batch inserted", rows=len(batch))
+            results = [True] * len(batch)
+        except Exception as exc:
+            logger.warning("Activity batch insert failed", rows=len(batch), error=str(exc))
+            # One bad row must not fail everyone else's message
+            results = self._insert_rows_individually(batch) if len(batch) > 1 else [False]
+
+        for (_, future), success in zip(batch, results):
+            if not future.done():
+                future.set_result(success)
+
+        return sum(results)
+
+    def _insert_rows_individually(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> List[bool]:
+        """Retry a failed batch row by row; returns per-row success."""
+        results = []
+        for activity, _ in batch:
+            try:
+                self.db.table("tg_jobs").insert(activity).execute()
+                results.append(True)
+            except Exception as exc:
+                logger.error("Error inserting activity", user_id=activity["tg_id"], error=str(exc))
+                results.append(False)
+        return results
+
+    async def _flush_later(self) -> None:
+        """Flush after the batching window closes."""
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
@@ -217,6 +217,30 @@ class FriendOperations:
         """Decline a friend request."""
         return await self.update_friend_request_status(requester_id, addressee_id, "declined")
 
+    @track_errors_async("friend_request_cancel")
+    async def cancel_friend_request(self, requester_id: int, addressee_id: int) -> bool:
+        """Cancel (delete) a pending outgoing friend request in a single query."""
+        try:
+            result = self.db.table("friendships").delete().eq(
+                "requester_id", requester_id
+            ).eq(
+                "addressee_id", addressee_id
+            ).eq("status", "pending").execute()
+            
+            if result.data:
+                logger.info("Friend request cancelled", 
+                           requester=requester_id, addressee=addressee_id)
+                return True
+            else:
+                logger.warning("No pending friend request to cancel", 
+                              requester=requester_id, addressee=addressee_id)
+                return False
+            
+        except Exception as exc:
+            logger.error("Error cancelling friend request", 
+                        requester=requester_id, addressee=addressee_id, error=str(exc))
+            return False
+
     @track_errors_async("friends_list_optimized")
     async def get_friends_list_optimized(self, user_id: int) -> List[Dict[str, Any]]:
         """Get list of user's friends with OPTIMIZED single query."""
@@ -202,6 +202,11 @@ class QuestionOperations:
             
             if new_question:
                 logger.info(f"Created new version of question {question_id} -> {new_question['id']}")
+                
+                # Default question ID changed - drop the cached one
+                if self.cache and old_question['is_default']:
+                    await self.cache.invalidate(f"default_question_id_{old_question['user_id']}")
+                
                 return new_question['id']
             
             return None
@@ -210,6 +215,77 @@ class QuestionOperations:
             logger.error(f"Error updating question text {question_id}: {e}")
             return None
     
+    @track_errors_async("ensure_and_update_default_question")
+    async def ensure_and_update_default_question(
+        self,
+        user_id: int,
+        window_start: Optional[str] = None,
+        window_end: Optional[str] = None,
+        interval_minutes: Optional[int] = None
+    ) -> Optional[Dict]:
+        """
+        Ensure default question exists and update its schedule via a single RPC call.
+        
+        Args:
+            user_id: Telegram user ID
+            window_start: New window start (HH:MM:SS) or None to keep current
+            window_end: New window end (HH:MM:SS) or None to keep current
+            interval_minutes: New interval or None to keep current
+            
+        Returns:
+            Updated default question dictionary or None if the RPC failed
+        """
+        try:
+            result = self.db_client.client.rpc('ensure_and_update_default_question', {
+                'p_user_id': user_id,
+                'p_window_start': window_start,
+                'p_window_end': window_end,
+                'p_interval_minutes': interval_minutes
+            }).execute()
+            
+            return result.data[0] if result.data else None
+            
+        except Exception as e:
+            logger.warning(f"Default question schedule function failed for user {user_id}: {e}")
+            return None
+    
+    @track_errors_async("handle_incoming_message")
+    async def handle_incoming_message(
+        self,
+        user_id: int,
+        username: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        reply_to_message_id: Optional[int] = None
+    ) -> Optional[Dict]:
+        """
+        Register user, ensure default question and resolve the answered question via a single RPC call.
+        
+        Args:
+            user_id: Telegram user ID
+            username: Telegram username
+            first_name: Telegram first name
+            last_name: Telegram last name
+            reply_to_message_id: ID of the message being replied to, if any
+            
+        Returns:
+            Dictionary with question_id, status and question_text, or None if the RPC failed
+        """
+        try:
+            result = self.db_client.client.rpc('handle_incoming_message', {
+                'p_tg_id': user_id,
+                'p_username': username,
+                'p_first_name': first_name,
+                'p_last_name': last_name,
+                'p_reply_to_message_id': reply_to_message_id
+            }).execute()
+            
+            return result.data[0] if result.data else None
+            
+        except Exception as e:
+            logger.warning(f"Incoming message function failed for user {user_id}: {e}")
+            return None
+    
     @track_errors_async("delete_question")
     async def delete_question(self, question_id: int) -> bool:
         """
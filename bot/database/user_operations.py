@@ -1,7 +1,7 @@
 """
 User-related database operations.
 """
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from bot.utils.cache_manager import CacheManager
 from monitoring import get_logger, set_user_context, track_errors_async
@@ -26,6 +26,12 @@ class UserOperations:
         set_user_context(tg_id, username, first_name)
         
         try:
+            # Recently seen users need no existence query
+            if self.cache:
+                cached_user = await self.cache.get(f"user_{tg_id}")
+                if cached_user:
+                    return cached_user
+            
             # Check if user exists
             result = self.db.table("users").select("*").eq("tg_id", tg_id).execute()
             
@@ -63,6 +69,31 @@ class UserOperations:
             logger.error("Error ensuring user exists", user_id=tg_id, error=str(exc))
             raise
     
+    @track_errors_async("user_registration")
+    async def upsert_user_returning(self, tg_id: int, username: str = None,
+                                    first_name: str = None, last_name: str = None,
+                                    language: str = 'ru') -> Optional[Dict[str, Any]]:
+        """Register user or refresh profile fields in one call, returning the stored row."""
+        set_user_context(tg_id, username, first_name)
+        
+        try:
+            result = self.db.client.rpc('upsert_user_returning', {
+                'p_tg_id': tg_id,
+                'p_username': username,
+                'p_first_name': first_name,
+                'p_last_name': last_name,
+                'p_language': language
+            }).execute()
+            
+            user = result.data[0] if result.data else None
+            if user and self.cache:
+                await self.cache.set(f"user_{tg_id}", user, 300)
+            return user
+            
+        except Exception as exc:
+            logger.warning("User upsert function failed", user_id=tg_id, error=str(exc))
+            return None
+    
     @track_errors_async("user_settings_get")
     async def get_user_settings(self, user_id: int, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
         """Get user settings with caching."""
@@ -99,6 +130,8 @@ class UserOperations:
             if self.cache:
                 await self.cache.invalidate(f"user_settings_{user_id}")
                 await self.cache.invalidate(f"user_{user_id}")
+                if 'language' in updates:
+                    await self.cache.invalidate(("user_language", user_id))
             
             logger.info("User settings updated", user_id=user_id, updates=list(updates.keys()))
             return True
@@ -154,6 +187,24 @@ class UserOperations:
             logger.error("Error finding user by username", username=username, error=str(exc))
             return None
     
+    @track_errors_async("user_lookup")
+    async def find_users_by_usernames(self, usernames: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Find several users by username in a single query, keyed by username."""
+        clean_usernames = list({username.lstrip('@') for username in usernames})
+        if not clean_usernames:
+            return {}
+        
+        try:
+            result = self.db.table("users").select("*").in_("tg_username", clean_usernames).execute()
+            
+            users = {user['tg_username']: user for user in result.data or []}
+            logger.debug("Users found by usernames", requested=len(clean_usernames), found=len(users))
+            return users
+            
+        except Exception as exc:
+            logger.error("Error finding users by usernames", usernames=clean_usernames, error=str(exc))
+            return {}
+    
     @track_errors_async("user_activity_log")
     async def log_activity(self, user_id: int, activity_text: str, question_id: Optional[int] = None) -> bool:
         """Log user activity to database with optional question linkage."""
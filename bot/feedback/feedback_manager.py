@@ -93,7 +93,7 @@ class FeedbackManager:
         }
         
         await self.user_cache.set(
-            f"feedback_session_{user_id}",
+            ("feedback_session", user_id),
             session_data,
             ttl=3600  # 1 hour timeout for feedback session
         )
@@ -111,11 +111,11 @@ class FeedbackManager:
     
     async def get_feedback_session(self, user_id: int) -> Optional[Dict]:
         """Get active feedback session for user."""
-        return await self.user_cache.get(f"feedback_session_{user_id}")
+        return await self.user_cache.get(("feedback_session", user_id))
     
     async def clear_feedback_session(self, user_id: int) -> None:
         """Clear feedback session for user."""
-        await self.user_cache.invalidate(f"feedback_session_{user_id}")
+        await self.user_cache.invalidate(("feedback_session", user_id))
     
     @track_errors_async("submit_feedback")
     async def submit_feedback(
@@ -4,13 +4,16 @@ Callback query handlers for inline keyboards.
 This module handles all callback queries from inline keyboard buttons.
 """
 
+import operator
+from functools import lru_cache
+
 from telegram import Update
 from telegram.ext import Application, CallbackQueryHandler, ContextTypes
 
 from bot.cache.ttl_cache import TTLCache
 from bot.config import Config
 from bot.database.client import DatabaseClient
-from bot.i18n import get_translator
+from bot.i18n import LanguageDetector, get_language_translator, get_translator
 from bot.keyboards.keyboard_generators import (
     KeyboardGenerator,
     create_friends_menu,
@@ -18,21 +21,39 @@ from bot.keyboards.keyboard_generators import (
     create_main_menu,
     create_settings_menu,
 )
+from bot.services.health_service import HealthService
+from bot.utils.markdown_utils import escape_markdown
 from bot.utils.rate_limiter import MultiTierRateLimiter, rate_limit
 from monitoring import get_logger, set_user_context, track_errors_async
 
 logger = get_logger(__name__)
 
+_get_deps = operator.itemgetter('db_client', 'user_cache', 'config')
+
+
+# How long a user's language stays cached; language changes invalidate it
+USER_LANGUAGE_TTL_SECONDS = 600
+
 
 async def get_user_language(user_id: int, db_client: DatabaseClient, user_cache: TTLCache, force_refresh: bool = False) -> str:
-    """Get user language from database with fallback."""
+    """Get user language from cache or database with fallback."""
+    language_key = ("user_language", user_id)
+    
+    if not force_refresh and user_cache:
+        language = await user_cache.get(language_key)
+        if LanguageDetector.is_language_supported(language):
+            return language
+    
     try:
         from bot.database.user_operations import UserOperations
         user_ops = UserOperations(db_client, user_cache)
         user_data = await user_ops.get_user_settings(user_id, force_refresh=force_refresh)
         
         if user_data and 'language' in user_data:
-            return user_data['language']
+            language = user_data['language']
+            if user_cache and LanguageDetector.is_language_supported(language):
+                await user_cache.set(language_key, language, USER_LANGUAGE_TTL_SECONDS)
+            return language
     except Exception as e:
         logger.warning(f"Failed to get user language: {e}")
     
@@ -42,11 +63,32 @@ async def get_user_language(user_id: int, db_client: DatabaseClient, user_cache:
 async def get_user_translator(user_id: int, db_client: DatabaseClient, user_cache: TTLCache, force_refresh: bool = False):
     """Get translator configured for user's language."""
     user_language = await get_user_language(user_id, db_client, user_cache, force_refresh=force_refresh)
-    # Create a copy to avoid modifying global translator
-    from bot.i18n.translator import Translator
-    user_translator = Translator()
-    user_translator.set_language(user_language)
-    return user_translator
+    # Cached per-language copy, so the global translator is never modified
+    return get_language_translator(user_language)
+
+
+@lru_cache(maxsize=8)
+def _settings_template(language: str) -> str:
+    """Build the settings display template for a language once."""
+    translator = get_language_translator(language)
+    return (
+        f"{translator.translate('settings.current_title')}\n\n"
+        f"{translator.translate('settings.notifications')}\n"
+        f"{translator.translate('settings.time_window')}: {{start}} - {{end}}\n"
+        f"{translator.translate('settings.frequency')}: {translator.translate('settings.every_minutes')}"
+    )
+
+
+def format_user_settings(user_data: dict, language: str) -> str:
+    """Render the user's notification settings in the given language."""
+    translator = get_language_translator(language)
+    status_key = 'settings.notifications_enabled' if user_data['enabled'] else 'settings.notifications_disabled'
+    return _settings_template(language).format(
+        status=translator.translate(status_key),
+        start=user_data['window_start'],
+        end=user_data['window_end'],
+        minutes=user_data['interval_min']
+    )
 
 
 @rate_limit("callback")
@@ -63,9 +105,7 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
     set_user_context(user.id, user.username, user.first_name)
     
     # Get dependencies
-    config: Config = context.bot_data['config']
-    db_client: DatabaseClient = context.bot_data['db_client']
-    user_cache: TTLCache = context.bot_data['user_cache']
+    db_client, user_cache, config = _get_deps(context.bot_data)
     
     # Get callback data first
     data = query.data
@@ -74,9 +114,7 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
     # For language change callbacks, force refresh cache
     force_refresh = data.startswith("language_") or data == "menu_language"
     user_language = await get_user_language(user.id, db_client, user_cache, force_refresh=force_refresh)
-    from bot.i18n.translator import Translator
-    translator = Translator()
-    translator.set_language(user_language)
+    translator = get_language_translator(user_language)
     
     try:
         if data == "main_menu":
@@ -99,6 +137,8 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
             await handle_friends_action(query, data, db_client, user, config, translator, user_cache)
         elif data.startswith("add_friend:"):
             await handle_add_friend_callback(query, data, db_client, user, config, translator, user_cache, context)
+        elif data.startswith("cancel_fr:"):
+            await handle_cancel_friend_request_callback(query, data, db_client, user, translator)
         elif data.startswith("admin_"):
             await handle_admin_action(query, data, db_client, user, config, translator, user_cache, context)
         elif data.startswith("feedback_") or data == "feedback_menu":
@@ -109,7 +149,7 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
                 target_user_id = int(data.split("_")[-1])
                 await handle_feedback_confirmation(update, context, action, target_user_id)
             else:
-                await handle_feedback_action(query, data, db_client, user_cache, user, config, translator)
+                await handle_feedback_action(query, data, db_client, user_cache, user, config, translator, context)
         elif data.startswith("questions_") or data == "questions_noop":
             await handle_questions_action(query, data, db_client, user_cache, user, config, translator)
         elif data == "back_main":
@@ -121,7 +161,7 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
         logger.error(f"Error handling callback {data}: {e}")
         await query.edit_message_text(
             translator.translate('errors.general'),
-            reply_markup=create_main_menu(config.is_admin_configured() and user.id == config.admin_user_id, translator)
+            reply_markup=create_main_menu(config.is_admin(user.id), translator)
         )
 
 
@@ -133,7 +173,7 @@ async def handle_main_menu(query, config: Config, user, translator=None, db_clie
         from bot.i18n import get_translator
         translator = get_translator()
     
-    keyboard = KeyboardGenerator.main_menu(config.is_admin_configured() and user.id == config.admin_user_id, translator)
+    keyboard = KeyboardGenerator.main_menu(config.is_admin(user.id), translator)
     
     welcome_text = f"👋 {translator.translate('welcome.greeting', name=user.first_name)}\n\n"
     welcome_text += translator.translate('welcome.description')
@@ -166,12 +206,7 @@ async def handle_settings_menu(query, db_client: DatabaseClient, user_cache: TTL
     keyboard = create_settings_menu(translator)
     
     # Localized settings display
-    enabled_status = translator.translate('settings.notifications_enabled') if user_data['enabled'] else translator.translate('settings.notifications_disabled')
-    
-    settings_text = f"{translator.translate('settings.current_title')}\n\n"
-    settings_text += f"{translator.translate('settings.notifications', status=enabled_status)}\n"
-    settings_text += f"{translator.translate('settings.time_window')}: {user_data['window_start']} - {user_data['window_end']}\n"
-    settings_text += f"{translator.translate('settings.frequency')}: {translator.translate('settings.every_minutes', minutes=user_data['interval_min'])}"
+    settings_text = format_user_settings(user_data, translator.current_language)
 
     await query.edit_message_text(
         settings_text,
@@ -285,12 +320,11 @@ async def handle_language_change(query, data: str, db_client: DatabaseClient, us
         if user_cache:
             await user_cache.invalidate(f"user_settings_{user.id}")
             await user_cache.invalidate(f"user_{user.id}")
+            await user_cache.invalidate(("user_language", user.id))
         
         if success:
-            # Create new translator with new language (don't modify global one)
-            from bot.i18n.translator import Translator
-            new_translator = Translator()
-            new_translator.set_language(new_language)
+            # Cached translator for the new language (global one stays untouched)
+            new_translator = get_language_translator(new_language)
             
             # Get language info
             lang_info = new_translator.get_language_info(new_language)
@@ -299,14 +333,12 @@ async def handle_language_change(query, data: str, db_client: DatabaseClient, us
                 new_translator.translate('language.changed', 
                                        language_name=lang_info['native'], 
                                        flag=lang_info['flag']),
-                reply_markup=KeyboardGenerator.main_menu(config.is_admin_configured() and user.id == config.admin_user_id, new_translator),
+                reply_markup=KeyboardGenerator.main_menu(config.is_admin(user.id), new_translator),
                 parse_mode='Markdown'
             )
         else:
             # If language column doesn't exist, just show success message anyway
-            from bot.i18n.translator import Translator
-            fallback_translator = Translator()
-            fallback_translator.set_language(new_language)  # Set temporarily for this response
+            fallback_translator = get_language_translator(new_language)
             
             # Get language info
             lang_info = fallback_translator.get_language_info(new_language)
@@ -316,16 +348,15 @@ async def handle_language_change(query, data: str, db_client: DatabaseClient, us
                                            language_name=lang_info['native'], 
                                            flag=lang_info['flag']) + "\n\n"
                 "📝 *Примечание: изменения будут применены после добавления поддержки в базу данных*",
-                reply_markup=KeyboardGenerator.main_menu(config.is_admin_configured() and user.id == config.admin_user_id, fallback_translator),
+                reply_markup=KeyboardGenerator.main_menu(config.is_admin(user.id), fallback_translator),
                 parse_mode='Markdown'
             )
     except Exception as e:
         logger.error(f"Error changing language: {e}")
-        from bot.i18n.translator import Translator
-        translator = Translator()
+        translator = get_language_translator('ru')
         await query.edit_message_text(
             translator.translate('errors.general'),
-            reply_markup=create_main_menu(config.is_admin_configured() and user.id == config.admin_user_id, translator),
+            reply_markup=create_main_menu(config.is_admin(user.id), translator),
             parse_mode='Markdown'
         )
 
@@ -348,7 +379,7 @@ async def handle_settings_action(query, data: str, db_client: DatabaseClient, us
         if not user_settings:
             await query.edit_message_text(
                 translator.translate('settings.error_get'),
-                reply_markup=KeyboardGenerator.main_menu(config.is_admin_configured() and user.id == config.admin_user_id, translator)
+                reply_markup=KeyboardGenerator.main_menu(config.is_admin(user.id), translator)
             )
             return
             
@@ -396,8 +427,7 @@ async def handle_friends_action(query, data: str, db_client: DatabaseClient, use
         if user_cache:
             translator = await get_user_translator(user.id, db_client, user_cache)
         else:
-            from bot.i18n.translator import Translator
-            translator = Translator()
+            translator = get_language_translator('ru')
     
     action = data.replace("friends_", "")
     
@@ -569,7 +599,7 @@ async def handle_admin_action(query, data: str, db_client: DatabaseClient, user,
         await handle_main_menu(query, config, user, translator)
 
 
-async def handle_feedback_action(query, data: str, db_client: DatabaseClient, user_cache: TTLCache, user, config: Config, translator=None):
+async def handle_feedback_action(query, data: str, db_client: DatabaseClient, user_cache: TTLCache, user, config: Config, translator=None, context=None):
     """Handle feedback-related actions."""
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     
@@ -607,12 +637,8 @@ async def handle_feedback_action(query, data: str, db_client: DatabaseClient, us
         # Start feedback session
         feedback_type = data.replace("feedback_", "")
         
-        # Initialize feedback manager
-        from bot.feedback import FeedbackManager
-        from bot.utils.rate_limiter import MultiTierRateLimiter
-        
-        rate_limiter = MultiTierRateLimiter(feedback_rate_limit=config.feedback_rate_limit)
-        feedback_manager = FeedbackManager(config, rate_limiter, user_cache)
+        from bot.handlers.feedback_handlers import get_feedback_manager
+        feedback_manager = get_feedback_manager(context)
         
         # Check rate limit
         if not await feedback_manager.check_rate_limit(user.id):
@@ -1109,16 +1135,35 @@ async def handle_add_friend_callback(query, data: str, db_client: DatabaseClient
         )
 
 
-async def handle_admin_health_check(query, db_client: DatabaseClient, config: Config, translator, context=None):
-    """Handle admin health check callback."""
+async def handle_cancel_friend_request_callback(query, data: str, db_client: DatabaseClient, user, translator):
+    """Handle cancel button attached to the /add_friend confirmation."""
     try:
-        # Импортируем HealthService и версию
-        from bot.services.health_service import HealthService
-        from bot.utils.version import get_bot_version
+        target_user_id = int(data.split(":")[1])
         
-        # Создаем health service
-        version = get_bot_version()
-        health_service = HealthService(db_client, version)
+        from bot.database.friend_operations import FriendOperations
+        friend_ops = FriendOperations(db_client)
+        
+        if await friend_ops.cancel_friend_request(user.id, target_user_id):
+            await query.edit_message_text(translator.translate('friends.request_cancelled'))
+        else:
+            await query.answer(
+                translator.translate('friends.request_cancel_failed'),
+                show_alert=True
+            )
+    
+    except Exception as e:
+        logger.error(f"Error handling cancel friend request callback: {e}")
+        await query.answer(
+            translator.translate('errors.general'),
+            show_alert=True
+        )
+
+
+async def handle_admin_health_check(query, db_client: DatabaseClient, config: Config, translator, context: ContextTypes.DEFAULT_TYPE):
+    """Handle admin health check callback."""
+    try:
+        # Общий health service с TTL-кэшем, как у /health
+        health_service: HealthService = context.bot_data['health_service']
         
         # Показываем индикатор загрузки
         await query.edit_message_text(
@@ -1126,11 +1171,8 @@ async def handle_admin_health_check(query, db_client: DatabaseClient, config: Co
             parse_mode='Markdown'
         )
         
-        # Получаем application из context
-        application = context.application if context else None
-        
         # Получаем статус здоровья системы
-        health_status = await health_service.get_system_health(application)
+        health_status = await health_service.get_cached_system_health(context.application)
         
         # Формируем красивое сообщение с использованием переводов
         status_emoji = {
@@ -1139,18 +1181,6 @@ async def handle_admin_health_check(query, db_client: DatabaseClient, config: Co
             "unhealthy": "❌"
         }
         
-        # Функция для безопасного экранирования текста для Markdown
-        def escape_markdown(text):
-            """Escape special characters for Markdown."""
-            if not text:
-                return ""
-            # Экранируем специальные символы Markdown
-            special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-            escaped_text = str(text)
-            for char in special_chars:
-                escaped_text = escaped_text.replace(char, f'\\{char}')
-            return escaped_text
-        
         # Основная информация с безопасным экранированием
         message = f"{translator.translate('admin.health_check_title')}\n\n"
         message += f"{status_emoji.get(health_status.status, '❓')} {translator.translate('admin.health_status', status=health_status.status.upper())}\n"
@@ -1225,12 +1255,8 @@ async def handle_admin_health_check(query, db_client: DatabaseClient, config: Co
         logger.error(f"Admin health check failed: {e}")
         
         # Fallback сообщение при ошибке с безопасным экранированием
-        def escape_markdown_simple(text):
-            """Simple escape for error messages."""
-            return str(text).replace('_', '\\_').replace('*', '\\*').replace('`', '\\`').replace('[', '\\[').replace(']', '\\]')
-        
         error_message = "❌ **Ошибка при проверке здоровья системы**\n\n"
-        safe_error = escape_markdown_simple(str(e))
+        safe_error = escape_markdown(str(e))
         error_message += f"Произошла ошибка: `{safe_error}`\n\n"
         error_message += "Попробуйте еще раз или свяжитесь с технической поддержкой."
         
@@ -4,23 +4,141 @@ Command handlers for the Doyobi Diary.
 This module contains all user command handlers (non-admin).
 """
 
+import asyncio
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update, WebAppInfo
 from telegram.ext import Application, CommandHandler, ContextTypes
 
 from bot.cache.ttl_cache import TTLCache
 from bot.config import Config
 from bot.database.client import DatabaseClient
+from bot.database.friend_operations import FriendOperations
 from bot.database.user_operations import UserOperations
-from bot.i18n import detect_user_language, get_translator
+from bot.handlers.callback_handlers import format_user_settings, get_user_translator
+from bot.i18n import detect_user_language, get_language_translator
 from bot.keyboards.keyboard_generators import create_friends_menu, create_main_menu, create_settings_menu
-from bot.utils.rate_limiter import MultiTierRateLimiter, rate_limit
+from bot.questions import QuestionManager
+from bot.services.health_service import HealthService
+from bot.utils.datetime_utils import validate_time_window, validate_username
+from bot.utils.markdown_utils import escape_markdown
+from bot.utils.rate_limiter import (
+    MultiTierRateLimiter,
+    acquire_telegram_send_slot,
+    concurrent_limit,
+    instrumented_handler,
+    rate_limit,
+    telegram_send_semaphore,
+)
+from bot.utils.version import get_bot_version
 from monitoring import get_logger, set_user_context, track_errors_async
 
 logger = get_logger(__name__)
 
+# Version is fixed for the lifetime of the process
+_BOT_VERSION = get_bot_version()
+
+
+def _compute_freq_text(interval_min: int) -> str:
+    """Format notification interval in minutes as human-readable Russian text."""
+    if interval_min < 60:
+        return f"{interval_min} минут"
+    elif interval_min == 60:
+        return "1 час"
+    elif interval_min < 1440:
+        hours = interval_min // 60
+        minutes = interval_min % 60
+        if minutes == 0:
+            return f"{hours} час{'а' if hours < 5 else 'ов'}"
+        return f"{hours} час{'а' if hours < 5 else 'ов'} {minutes} минут"
+    return f"{interval_min // 60} часов"
+
+
+def _get_user_language(context: ContextTypes.DEFAULT_TYPE, user) -> str:
+    """Return the user's detected language, cached in user_data for the session."""
+    user_language = context.user_data.get('lang')
+    if user_language is None:
+        user_language = context.user_data['lang'] = detect_user_language(user)
+    return user_language
+
 
-@rate_limit("general")
-@track_errors_async("start_command")
+async def _send_notification(bot, chat_id: int, text: str) -> None:
+    """Send a message to another user within Telegram outbound limits."""
+    await acquire_telegram_send_slot(chat_id)
+    async with telegram_send_semaphore:
+        await bot.send_message(chat_id=chat_id, text=text)
+
+
+async def _reply(message, text: str, reply_markup=None) -> None:
+    """Reply to the caller while holding an outbound Telegram slot."""
+    async with telegram_send_semaphore:
+        await message.reply_text(text, reply_markup=reply_markup)
+
+
+async def _reply_and_notify(message, reply_text: str, bot, chat_id: int, notify_text: str, reply_markup=None) -> None:
+    """
+    Reply to the caller and notify the other user concurrently.
+    
+    A failed notification is only logged; a failed reply is re-raised.
+    """
+    reply_result, notify_result = await asyncio.gather(
+        _reply(message, reply_text, reply_markup),
+        _send_notification(bot, chat_id, notify_text),
+        return_exceptions=True
+    )
+    
+    if isinstance(notify_result, Exception):
+        logger.warning("Could not notify user %s: %s", chat_id, notify_result)
+    
+    if isinstance(reply_result, Exception):
+        raise reply_result
+
+
+# Health status indicators for /health
+_STATUS_EMOJI = {
+    "healthy": "✅",
+    "degraded": "⚠️",
+    "unhealthy": "❌"
+}
+
+# Frequency texts for the most common /freq values
+_FREQ_TEXT = {
+    interval: _compute_freq_text(interval)
+    for interval in (5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 240, 360, 480, 720, 1440)
+}
+
+# Usage texts shown when a command is called without arguments
+_ADD_FRIEND_HELP = (
+    "👥 **Добавить друга**\n\n"
+    "Использование: `/add_friend @username`\n\n"
+    "Пример: `/add_friend @john_doe`"
+)
+_ACCEPT_HELP = (
+    "👥 **Принять в друзья**\n\n"
+    "Использование: `/accept @username`"
+)
+_DECLINE_HELP = (
+    "👥 **Отклонить заявку**\n\n"
+    "Использование: `/decline @username`"
+)
+_WINDOW_HELP = (
+    "⏰ **Установить временное окно**\n\n"
+    "Использование: `/window HH:MM-HH:MM`\n\n"
+    "Примеры:\n"
+    "• `/window 09:00-18:00` - с 9 утра до 6 вечера\n"
+    "• `/window 22:00-06:00` - с 10 вечера до 6 утра"
+)
+_FREQ_HELP = (
+    "📊 **Установить частоту уведомлений**\n\n"
+    "Использование: `/freq N`\n\n"
+    "Где N - интервал в минутах между уведомлениями.\n\n"
+    "Примеры:\n"
+    "• `/freq 60` - каждый час\n"
+    "• `/freq 120` - каждые 2 часа\n"
+    "• `/freq 30` - каждые 30 минут"
+)
+
+
+@instrumented_handler("start_command", action="general")
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /start command - register user and show main menu."""
     user = update.effective_user
@@ -30,36 +148,39 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     set_user_context(user.id, user.username, user.first_name)
     
     # Get dependencies from context
-    db_client: DatabaseClient = context.bot_data['db_client']
     config: Config = context.bot_data['config']
     
-    # Get user cache
-    user_cache: TTLCache = context.bot_data['user_cache']
-    
     # Detect user language
-    user_language = detect_user_language(user)
-    translator = get_translator()
-    translator.set_language(user_language)
-    
-    # Ensure user exists in database
-    user_ops = UserOperations(db_client, user_cache)
+    user_language = _get_user_language(context, user)
+    translator = get_language_translator(user_language)
+    
+    # Register user (or refresh profile) and read stored settings in one call
+    user_ops: UserOperations = context.bot_data['user_ops']
+    user_profile = {
+        'tg_id': user.id,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'language': user_language
+    }
     try:
-        await user_ops.ensure_user_exists(
-            tg_id=user.id,
-            username=user.username,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            language=user_language
-        )
+        user_row = await user_ops.upsert_user_returning(**user_profile)
+        if user_row is None:
+            user_row = await user_ops.ensure_user_exists(**user_profile)
     except Exception as e:
-        logger.error(f"Failed to ensure user exists: {e}")
+        logger.error("Failed to ensure user exists: %s", e)
         await update.message.reply_text(
             translator.translate("errors.registration")
         )
         return
+    
+    # Greet returning users in the language they chose
+    stored_language = user_row.get('language')
+    if stored_language and stored_language != user_language:
+        translator = get_language_translator(stored_language)
 
     # Create main menu
-    keyboard = create_main_menu(config.is_admin_configured() and user.id == config.admin_user_id)
+    keyboard = create_main_menu(config.is_admin(user.id), translator)
     
     welcome_text = f"{translator.translate('welcome.greeting', name=user.first_name)}\n\n" \
                    f"{translator.translate('welcome.description')}"
@@ -70,11 +191,10 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         parse_mode='Markdown'
     )
     
-    logger.info(f"User {user.id} opened main menu")
+    logger.info("User %s opened main menu", user.id)
 
 
-@rate_limit("settings")
-@track_errors_async("settings_command")
+@instrumented_handler("settings_command", action="settings")
 async def settings_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show user settings from database."""
     user = update.effective_user
@@ -84,26 +204,22 @@ async def settings_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     set_user_context(user.id, user.username, user.first_name)
     
     # Get dependencies
-    db_client: DatabaseClient = context.bot_data['db_client']
-    user_cache: TTLCache = context.bot_data['user_cache']
+    user_ops: UserOperations = context.bot_data['user_ops']
     
     # Get user settings from database
-    user_ops = UserOperations(db_client, user_cache)
     user_data = await user_ops.get_user_settings(user.id)
     
     if not user_data:
+        translator = get_language_translator(_get_user_language(context, user))
         await update.message.reply_text(
-            "❌ Не удалось получить настройки. Попробуйте /start"
+            translator.translate("settings.error_missing")
         )
         return
     
     # Create settings menu
     keyboard = create_settings_menu()
     
-    settings_text = f"⚙️ **Твои настройки:**\n\n" \
-                   f"🔔 Уведомления: {'✅ Включены' if user_data['enabled'] else '❌ Отключены'}\n" \
-                   f"⏰ Время: {user_data['window_start']} - {user_data['window_end']}\n" \
-                   f"📊 Частота: каждые {user_data['interval_min']} минут"
+    settings_text = format_user_settings(user_data, user_data.get('language') or 'ru')
 
     await update.message.reply_text(
         settings_text,
@@ -112,8 +228,7 @@ async def settings_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     )
 
 
-@rate_limit("general")
-@track_errors_async("history_command")
+@instrumented_handler("history_command", action="general")
 async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Open web interface for activity history."""
     user = update.effective_user
@@ -127,17 +242,18 @@ async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     user_cache: TTLCache = context.bot_data['user_cache']
     
     # Get user translator
-    from bot.handlers.callback_handlers import get_user_translator
     translator = await get_user_translator(user.id, db_client, user_cache)
     
+    history_title = translator.translate('menu.history')
+    
     # Create web app button for main webapp page
     web_app = WebAppInfo(url=config.webapp_url)
     keyboard = InlineKeyboardMarkup([[
-        InlineKeyboardButton(translator.translate('menu.history'), web_app=web_app)
+        InlineKeyboardButton(history_title, web_app=web_app)
     ]])
     
     await update.message.reply_text(
-        f"**{translator.translate('menu.history')}**\n\n"
+        f"**{history_title}**\n\n"
         f"{translator.translate('history.webapp_description')}",
         reply_markup=keyboard,
         parse_mode='Markdown'
@@ -145,6 +261,7 @@ async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
 
 @rate_limit("friend_request")
+@concurrent_limit("friend_request", max_concurrent=2)
 @track_errors_async("add_friend_command")
 async def add_friend_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /add_friend command."""
@@ -156,9 +273,7 @@ async def add_friend_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     if not context.args:
         await update.message.reply_text(
-            "👥 **Добавить друга**\n\n"
-            "Использование: `/add_friend @username`\n\n"
-            "Пример: `/add_friend @john_doe`",
+            _ADD_FRIEND_HELP,
             parse_mode='Markdown'
         )
         return
@@ -166,7 +281,6 @@ async def add_friend_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     # Extract and validate username
     target_username_raw = context.args[0]
     
-    from bot.utils.datetime_utils import validate_username
     is_valid, error_msg = validate_username(target_username_raw)
     if not is_valid:
         await update.message.reply_text(
@@ -179,13 +293,8 @@ async def add_friend_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     target_username = target_username_raw.lstrip('@')
     
     # Get dependencies
-    db_client: DatabaseClient = context.bot_data['db_client']
-    user_cache: TTLCache = context.bot_data['user_cache']
-    
-    # Implement friend request logic
-    from bot.database.friend_operations import FriendOperations
-    friend_ops = FriendOperations(db_client)
-    user_ops = UserOperations(db_client, user_cache)
+    friend_ops: FriendOperations = context.bot_data['friend_ops']
+    user_ops: UserOperations = context.bot_data['user_ops']
     
     # Find target user by username
     target_user = await user_ops.find_user_by_username(target_username)
@@ -201,29 +310,28 @@ async def add_friend_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     # Send friend request (will check for existing friendship internally)
     success = await friend_ops.create_friend_request(user.id, target_id)
     if success:
-        await update.message.reply_text(
+        # Let the requester withdraw the request without a follow-up command
+        cancel_keyboard = InlineKeyboardMarkup([[
+            InlineKeyboardButton("❌ Отменить запрос", callback_data=f"cancel_fr:{target_id}")
+        ]])
+        # Confirm to requester and notify target user concurrently
+        await _reply_and_notify(
+            update.message,
             f"📤 Запрос в друзья отправлен пользователю @{target_username}!\n\n"
-            "Ожидайте подтверждения."
+            "Ожидайте подтверждения.",
+            context.bot,
+            target_id,
+            f"👤 Пользователь @{user.username or user.first_name} хочет добавить вас в друзья!\n\n"
+            f"Используйте /friend_requests для управления запросами.",
+            reply_markup=cancel_keyboard
         )
-        
-        # Notify target user if possible
-        try:
-            await context.bot.send_message(
-                chat_id=target_id,
-                text=f"👤 Пользователь @{user.username or user.first_name} хочет добавить вас в друзья!\n\n"
-                     f"Используйте /friend_requests для управления запросами."
-            )
-        except Exception as e:
-            logger.warning(f"Could not notify user {target_id}: {e}")
-            
     else:
         await update.message.reply_text(
             "❌ Ошибка при отправке запроса в друзья. Попробуйте позже."
         )
 
 
-@rate_limit("general")
-@track_errors_async("friends_command")
+@instrumented_handler("friends_command", action="general")
 async def friends_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show friends menu."""
     user = update.effective_user
@@ -243,8 +351,7 @@ async def friends_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     )
 
 
-@rate_limit("general")
-@track_errors_async("friend_requests_command")
+@instrumented_handler("friend_requests_command", action="general")
 async def friend_requests_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show friend requests management."""
     user = update.effective_user
@@ -254,10 +361,7 @@ async def friend_requests_command(update: Update, context: ContextTypes.DEFAULT_
     set_user_context(user.id, user.username, user.first_name)
     
     # Get dependencies
-    db_client: DatabaseClient = context.bot_data['db_client']
-    
-    from bot.database.friend_operations import FriendOperations
-    friend_ops = FriendOperations(db_client)
+    friend_ops: FriendOperations = context.bot_data['friend_ops']
     
     # Get friend requests
     requests_data = await friend_ops.get_friend_requests_optimized(user.id)
@@ -265,31 +369,35 @@ async def friend_requests_command(update: Update, context: ContextTypes.DEFAULT_
     incoming = requests_data.get('incoming', [])
     outgoing = requests_data.get('outgoing', [])
     
-    text = "📥 **Запросы в друзья**\n\n"
+    unknown = 'Неизвестно'
+    parts = ["📥 **Запросы в друзья**\n\n"]
     
     if incoming:
-        text += "**Входящие запросы:**\n"
+        parts.append("**Входящие запросы:**\n")
         for req in incoming[:5]:  # Показываем только первые 5
-            username = req.get('tg_username', 'Неизвестно')
+            username = req.get('tg_username', unknown)
             name = req.get('tg_first_name', '')
-            text += f"• @{username} ({name})\n"
-            text += f"  `/accept @{username}` | `/decline @{username}`\n\n"
+            parts.append(
+                f"• @{username} ({name})\n"
+                f"  `/accept @{username}` | `/decline @{username}`\n\n"
+            )
     else:
-        text += "**Входящие запросы:** нет\n\n"
+        parts.append("**Входящие запросы:** нет\n\n")
     
     if outgoing:
-        text += "**Исходящие запросы:**\n"
+        parts.append("**Исходящие запросы:**\n")
         for req in outgoing[:5]:  # Показываем только первые 5
-            username = req.get('tg_username', 'Неизвестно')
+            username = req.get('tg_username', unknown)
             name = req.get('tg_first_name', '')
-            text += f"• @{username} ({name}) - ожидает ответа\n"
+            parts.append(f"• @{username} ({name}) - ожидает ответа\n")
     else:
-        text += "**Исходящие запросы:** нет"
+        parts.append("**Исходящие запросы:** нет")
     
-    await update.message.reply_text(text, parse_mode='Markdown')
+    await update.message.reply_text(''.join(parts), parse_mode='Markdown')
 
 
 @rate_limit("friend_request")
+@concurrent_limit("friend_request", max_concurrent=2)
 @track_errors_async("accept_friend_command")  
 async def accept_friend_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Accept friend request."""
@@ -301,8 +409,7 @@ async def accept_friend_command(update: Update, context: ContextTypes.DEFAULT_TY
     
     if not context.args:
         await update.message.reply_text(
-            "👥 **Принять в друзья**\n\n"
-            "Использование: `/accept @username`",
+            _ACCEPT_HELP,
             parse_mode='Markdown'
         )
         return
@@ -310,17 +417,12 @@ async def accept_friend_command(update: Update, context: ContextTypes.DEFAULT_TY
     target_username = context.args[0].lstrip('@')
     
     # Get dependencies
-    db_client: DatabaseClient = context.bot_data['db_client']
-    user_cache: TTLCache = context.bot_data['user_cache']
-    
-    from bot.database.friend_operations import FriendOperations
-    from bot.database.user_operations import UserOperations
-    
-    friend_ops = FriendOperations(db_client)
-    user_ops = UserOperations(db_client, user_cache)
+    friend_ops: FriendOperations = context.bot_data['friend_ops']
+    user_ops: UserOperations = context.bot_data['user_ops']
     
     # Find requester by username
-    requester = await user_ops.find_user_by_username(target_username)
+    requesters = await user_ops.find_users_by_usernames([target_username])
+    requester = requesters.get(target_username)
     if not requester:
         await update.message.reply_text(
             f"❌ Пользователь @{target_username} не найден."
@@ -330,19 +432,15 @@ async def accept_friend_command(update: Update, context: ContextTypes.DEFAULT_TY
     # Accept friend request
     success = await friend_ops.accept_friend_request(requester['tg_id'], user.id)
     if success:
-        await update.message.reply_text(
+        # Confirm to user and notify requester concurrently
+        await _reply_and_notify(
+            update.message,
             f"✅ Заявка в друзья от @{target_username} принята!\n\n"
-            "Теперь вы друзья! 🎉"
+            "Теперь вы друзья! 🎉",
+            context.bot,
+            requester['tg_id'],
+            f"🎉 @{user.username or user.first_name} принял вашу заявку в друзья!"
         )
-        
-        # Notify requester if possible
-        try:
-            await context.bot.send_message(
-                chat_id=requester['tg_id'],
-                text=f"🎉 @{user.username or user.first_name} принял вашу заявку в друзья!"
-            )
-        except Exception as e:
-            logger.warning(f"Could not notify user {requester['tg_id']}: {e}")
     else:
         await update.message.reply_text(
             f"❌ Заявки в друзья от @{target_username} не найдено или она уже обработана."
@@ -350,6 +448,7 @@ async def accept_friend_command(update: Update, context: ContextTypes.DEFAULT_TY
 
 
 @rate_limit("friend_request")
+@concurrent_limit("friend_request", max_concurrent=2)
 @track_errors_async("decline_friend_command")
 async def decline_friend_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Decline friend request."""
@@ -361,8 +460,7 @@ async def decline_friend_command(update: Update, context: ContextTypes.DEFAULT_T
     
     if not context.args:
         await update.message.reply_text(
-            "👥 **Отклонить заявку**\n\n"
-            "Использование: `/decline @username`",
+            _DECLINE_HELP,
             parse_mode='Markdown'
         )
         return
@@ -370,17 +468,12 @@ async def decline_friend_command(update: Update, context: ContextTypes.DEFAULT_T
     target_username = context.args[0].lstrip('@')
     
     # Get dependencies
-    db_client: DatabaseClient = context.bot_data['db_client']
-    user_cache: TTLCache = context.bot_data['user_cache']
-    
-    from bot.database.friend_operations import FriendOperations
-    from bot.database.user_operations import UserOperations
-    
-    friend_ops = FriendOperations(db_client)
-    user_ops = UserOperations(db_client, user_cache)
+    friend_ops: FriendOperations = context.bot_data['friend_ops']
+    user_ops: UserOperations = context.bot_data['user_ops']
     
     # Find requester by username
-    requester = await user_ops.find_user_by_username(target_username)
+    requesters = await user_ops.find_users_by_usernames([target_username])
+    requester = requesters.get(target_username)
     if not requester:
         await update.message.reply_text(
             f"❌ Пользователь @{target_username} не найден."
@@ -390,26 +483,21 @@ async def decline_friend_command(update: Update, context: ContextTypes.DEFAULT_T
     # Decline friend request
     success = await friend_ops.decline_friend_request(requester['tg_id'], user.id)
     if success:
-        await update.message.reply_text(
-            f"❌ Заявка в друзья от @{target_username} отклонена."
+        # Confirm to user and notify requester concurrently
+        await _reply_and_notify(
+            update.message,
+            f"❌ Заявка в друзья от @{target_username} отклонена.",
+            context.bot,
+            requester['tg_id'],
+            f"❌ @{user.username or user.first_name} отклонил вашу заявку в друзья."
         )
-        
-        # Notify requester if possible
-        try:
-            await context.bot.send_message(
-                chat_id=requester['tg_id'],
-                text=f"❌ @{user.username or user.first_name} отклонил вашу заявку в друзья."
-            )
-        except Exception as e:
-            logger.warning(f"Could not notify user {requester['tg_id']}: {e}")
     else:
         await update.message.reply_text(
             f"❌ Заявки в друзья от @{target_username} не найдено или она уже обработана."
         )
 
 
-@rate_limit("settings")
-@track_errors_async("window_command")
+@instrumented_handler("window_command", action="settings")
 async def window_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Set time window for default question notifications."""
     user = update.effective_user
@@ -420,11 +508,7 @@ async def window_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     
     if not context.args:
         await update.message.reply_text(
-            "⏰ **Установить временное окно**\n\n"
-            "Использование: `/window HH:MM-HH:MM`\n\n"
-            "Примеры:\n"
-            "• `/window 09:00-18:00` - с 9 утра до 6 вечера\n"
-            "• `/window 22:00-06:00` - с 10 вечера до 6 утра",
+            _WINDOW_HELP,
             parse_mode='Markdown'
         )
         return
@@ -432,7 +516,6 @@ async def window_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     time_range = context.args[0]
     
     # Validate time format
-    from bot.utils.datetime_utils import validate_time_window
     is_valid, error_msg, start_time, end_time = validate_time_window(time_range)
     if not is_valid:
         await update.message.reply_text(
@@ -443,29 +526,13 @@ async def window_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         )
         return
     
-    # Get dependencies
-    db_client: DatabaseClient = context.bot_data['db_client']
-    user_cache: TTLCache = context.bot_data['user_cache']
-    
-    # Initialize question manager and ensure user has default question
-    from bot.questions import QuestionManager
-    question_manager = QuestionManager(db_client, user_cache)
+    # Shared question manager (created once in setup_command_handlers)
+    question_manager: QuestionManager = context.bot_data['question_manager']
     
     try:
-        # Ensure user has default question
-        await question_manager.ensure_user_has_default_question(user.id)
-        
-        # Get default question
-        default_question = await question_manager.get_user_default_question(user.id)
-        if not default_question:
-            await update.message.reply_text(
-                "❌ Ошибка получения дефолтного вопроса. Попробуйте /start"
-            )
-            return
-        
-        # Update time window for default question
-        success = await question_manager.question_ops.update_question_schedule(
-            default_question['id'], 
+        # Ensure default question exists and update its time window in one round-trip
+        success = await question_manager.upsert_default_question_schedule(
+            user.id,
             window_start=start_time.strftime('%H:%M:%S'),
             window_end=end_time.strftime('%H:%M:%S')
         )
@@ -477,20 +544,19 @@ async def window_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 f"Теперь уведомления будут приходить только в это время.",
                 parse_mode='Markdown'
             )
-            logger.info(f"Time window updated for user {user.id}: {time_range}")
+            logger.info("Time window updated for user %s: %s", user.id, time_range)
         else:
             await update.message.reply_text(
                 "❌ Ошибка при обновлении временного окна. Попробуйте позже."
             )
     except Exception as e:
-        logger.error(f"Error updating time window for user {user.id}: {e}")
+        logger.error("Error updating time window for user %s: %s", user.id, e)
         await update.message.reply_text(
             "❌ Ошибка при обновлении настроек. Попробуйте позже."
         )
 
 
-@rate_limit("settings")
-@track_errors_async("freq_command")
+@instrumented_handler("freq_command", action="settings")
 async def freq_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Set notification frequency for default question."""
     user = update.effective_user
@@ -501,32 +567,13 @@ async def freq_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     
     if not context.args:
         await update.message.reply_text(
-            "📊 **Установить частоту уведомлений**\n\n"
-            "Использование: `/freq N`\n\n"
-            "Где N - интервал в минутах между уведомлениями.\n\n"
-            "Примеры:\n"
-            "• `/freq 60` - каждый час\n"
-            "• `/freq 120` - каждые 2 часа\n"
-            "• `/freq 30` - каждые 30 минут",
+            _FREQ_HELP,
             parse_mode='Markdown'
         )
         return
     
-    try:
-        interval_min = int(context.args[0])
-        if interval_min < 5:
-            await update.message.reply_text(
-                "❌ Минимальный интервал: 5 минут\n\n"
-                "Пример: `/freq 30`"
-            )
-            return
-        elif interval_min > 1440:  # 24 hours
-            await update.message.reply_text(
-                "❌ Максимальный интервал: 1440 минут (24 часа)\n\n"
-                "Пример: `/freq 120`"
-            )
-            return
-    except ValueError:
+    interval_arg = context.args[0]
+    if not interval_arg.lstrip('-').isdecimal():
         await update.message.reply_text(
             "❌ Неверный формат числа\n\n"
             "Использование: `/freq N`\n"
@@ -534,47 +581,33 @@ async def freq_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         )
         return
     
-    # Get dependencies
-    db_client: DatabaseClient = context.bot_data['db_client']
-    user_cache: TTLCache = context.bot_data['user_cache']
+    interval_min = int(interval_arg)
+    if interval_min < 5:
+        await update.message.reply_text(
+            "❌ Минимальный интервал: 5 минут\n\n"
+            "Пример: `/freq 30`"
+        )
+        return
+    elif interval_min > 1440:  # 24 hours
+        await update.message.reply_text(
+            "❌ Максимальный интервал: 1440 минут (24 часа)\n\n"
+            "Пример: `/freq 120`"
+        )
+        return
     
-    # Initialize question manager and ensure user has default question
-    from bot.questions import QuestionManager
-    question_manager = QuestionManager(db_client, user_cache)
+    # Shared question manager (created once in setup_command_handlers)
+    question_manager: QuestionManager = context.bot_data['question_manager']
     
     try:
-        # Ensure user has default question
-        await question_manager.ensure_user_has_default_question(user.id)
-        
-        # Get default question
-        default_question = await question_manager.get_user_default_question(user.id)
-        if not default_question:
-            await update.message.reply_text(
-                "❌ Ошибка получения дефолтного вопроса. Попробуйте /start"
-            )
-            return
-        
-        # Update frequency for default question
-        success = await question_manager.question_ops.update_question_schedule(
-            default_question['id'], 
+        # Ensure default question exists and update its frequency in one round-trip
+        success = await question_manager.upsert_default_question_schedule(
+            user.id,
             interval_minutes=interval_min
         )
         
         if success:
-            # Calculate human-readable frequency
-            if interval_min < 60:
-                freq_text = f"{interval_min} минут"
-            elif interval_min == 60:
-                freq_text = "1 час"
-            elif interval_min < 1440:
-                hours = interval_min // 60
-                minutes = interval_min % 60
-                if minutes == 0:
-                    freq_text = f"{hours} час{'а' if hours < 5 else 'ов'}"
-                else:
-                    freq_text = f"{hours} час{'а' if hours < 5 else 'ов'} {minutes} минут"
-            else:
-                freq_text = f"{interval_min // 60} часов"
+            # Human-readable frequency (precomputed for common intervals)
+            freq_text = _FREQ_TEXT.get(interval_min) or _compute_freq_text(interval_min)
             
             await update.message.reply_text(
                 f"✅ **Частота уведомлений обновлена!**\n\n"
@@ -582,20 +615,19 @@ async def freq_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
                 f"Следующее уведомление придёт через {freq_text}.",
                 parse_mode='Markdown'
             )
-            logger.info(f"Frequency updated for user {user.id}: {interval_min} minutes")
+            logger.info("Frequency updated for user %s: %s minutes", user.id, interval_min)
         else:
             await update.message.reply_text(
                 "❌ Ошибка при обновлении частоты. Попробуйте позже."
             )
     except Exception as e:
-        logger.error(f"Error updating frequency for user {user.id}: {e}")
+        logger.error("Error updating frequency for user %s: %s", user.id, e)
         await update.message.reply_text(
             "❌ Ошибка при обновлении настроек. Попробуйте позже."
         )
 
 
-@rate_limit("general")
-@track_errors_async("health_command")
+@instrumented_handler("health_command", action="general")
 async def health_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /health command - show system health status."""
     user = update.effective_user
@@ -605,66 +637,48 @@ async def health_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     set_user_context(user.id, user.username, user.first_name)
     
     # Get dependencies from context
-    config: Config = context.bot_data['config']
-    db_client: DatabaseClient = context.bot_data['db_client']
-    
-    # Импортируем HealthService
-    from bot.services.health_service import HealthService
-    from bot.utils.version import get_bot_version
+    health_service: HealthService = context.bot_data['health_service']
     
     try:
-        # Создаем health service
-        version = get_bot_version()
-        health_service = HealthService(db_client, version)
-        
         # Получаем статус здоровья системы
-        health_status = await health_service.get_system_health(context.application)
-        
-        # Формируем сообщение
-        status_emoji = {
-            "healthy": "✅",
-            "degraded": "⚠️", 
-            "unhealthy": "❌"
-        }
-        
-        # Безопасное экранирование для Markdown
-        def escape_markdown_safe(text):
-            if not text:
-                return ""
-            return str(text).replace('_', '\\_').replace('*', '\\*').replace('`', '\\`').replace('[', '\\[').replace(']', '\\]')
-        
-        message = f"🏥 **System Health Check**\n\n"
-        message += f"{status_emoji.get(health_status.status, '❓')} **Overall Status:** {health_status.status}\n"
+        health_status = await health_service.get_cached_system_health(context.application)
         
         # Безопасное время
-        timestamp_safe = health_status.timestamp.split('T')[0] + ' ' + health_status.timestamp.split('T')[1][:8]
-        message += f"📅 **Timestamp:** `{timestamp_safe}`\n"
-        message += f"🔢 **Version:** {health_status.version}\n"
-        message += f"⏱️ **Uptime:** {health_status.uptime_seconds:.1f}s\n\n"
+        date_part, time_part = health_status.timestamp.split('T', 1)
         
-        message += "**Components:**\n"
+        # Формируем сообщение
+        parts = [
+            "🏥 **System Health Check**\n\n",
+            f"{_STATUS_EMOJI.get(health_status.status, '❓')} **Overall Status:** {health_status.status}\n",
+            f"📅 **Timestamp:** `{date_part} {time_part[:8]}`\n",
+            f"🔢 **Version:** {health_status.version}\n",
+            f"⏱️ **Uptime:** {health_status.uptime_seconds:.1f}s\n\n",
+            "**Components:**\n",
+        ]
         for name, component in health_status.components.items():
-            emoji = status_emoji.get(component.status, '❓')
-            message += f"{emoji} **{name.title()}:** {component.status}"
+            emoji = _STATUS_EMOJI.get(component.status, '❓')
+            parts.append(f"{emoji} **{name.title()}:** {component.status}")
             
             if component.latency_ms:
-                message += f" ({component.latency_ms:.0f}ms)"
+                parts.append(f" ({component.latency_ms:.0f}ms)")
             
             if component.error:
-                safe_error = escape_markdown_safe(component.error)
-                message += f"\n   ⚠️ Error: `{safe_error}`"
+                safe_error = escape_markdown(component.error)
+                parts.append(f"\n   ⚠️ Error: `{safe_error}`")
                 
-            message += "\n"
+            parts.append("\n")
+        
+        message = ''.join(parts)
         
         await update.message.reply_text(
             message,
             parse_mode='Markdown'
         )
         
-        logger.info(f"Health check command executed for user {user.id}, status: {health_status.status}")
+        logger.info("Health check command executed for user %s, status: %s", user.id, health_status.status)
         
     except Exception as e:
-        logger.error(f"Health command failed for user {user.id}: {e}")
+        logger.error("Health command failed for user %s: %s", user.id, e)
         await update.message.reply_text(
             "❌ Failed to check system health. Please try again later.",
             parse_mode='Markdown'
@@ -685,7 +699,11 @@ def setup_command_handlers(
         'db_client': db_client,
         'user_cache': user_cache,
         'rate_limiter': rate_limiter,
-        'config': config
+        'config': config,
+        'user_ops': UserOperations(db_client, user_cache),
+        'friend_ops': FriendOperations(db_client),
+        'question_manager': QuestionManager(db_client, user_cache),
+        'health_service': HealthService(db_client, _BOT_VERSION)
     })
     
     # Register command handlers
@@ -1,16 +1,56 @@
 """
 Error handling for Telegram bot operations.
 """
+import asyncio
+import html
 import traceback
 
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from bot.i18n import detect_user_language, get_language_translator
 from bot.utils.exceptions import AdminRequired, RateLimitExceeded, ValidationError
 from monitoring import get_logger, set_user_context
 
 logger = get_logger(__name__)
 
+# Pre-rendered HTML; action names contain underscores that break Markdown
+_RATE_LIMIT_MESSAGE = (
+    "🚫 <b>Превышен лимит запросов</b>\n\n"
+    "Вы отправляете команды слишком часто.\n"
+    "Попробуйте снова через {time_msg}.\n\n"
+    "Действие: {action}"
+)
+_ADMIN_REQUIRED_MESSAGE = "🔒 <b>Доступ запрещен</b>\n\nЭта команда доступна только администраторам."
+_VALIDATION_ERROR_MESSAGE = "❌ <b>Ошибка валидации</b>\n\n{error}"
+
+# Tracebacks deeper than this are formatted off the event loop
+_DEEP_TRACEBACK_FRAMES = 50
+
+
+def _traceback_depth(error: BaseException) -> int:
+    """Count frames in the error's traceback."""
+    depth = 0
+    tb = getattr(error, '__traceback__', None)
+    while tb is not None:
+        depth += 1
+        tb = tb.tb_next
+    return depth
+
+
+def _error_language(update: Update, context: ContextTypes.DEFAULT_TYPE) -> str:
+    """Language for error replies: the session's cached one, else detected from the user."""
+    user_data = context.user_data or {}
+    language = user_data.get('lang')
+    if language is None:
+        language = detect_user_language(update.effective_user) if update.effective_user else 'ru'
+    return language
+
+
+def _format_traceback(error: BaseException) -> str:
+    """Render the error's traceback the way the logger would."""
+    return "".join(traceback.format_exception(type(error), error, error.__traceback__)).rstrip()
+
 
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle errors that occur during bot operation."""
@@ -38,20 +78,29 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
         await handle_validation_error(update, context, error)
         return
     
-    # Log all other errors
-    logger.error(
-        "Unhandled error occurred",
-        error_type=type(error).__name__,
-        error_message=str(error),
-        traceback=traceback.format_exc()
-    )
+    # Log all other errors; deep tracebacks are rendered in a worker thread
+    if _traceback_depth(error) > _DEEP_TRACEBACK_FRAMES:
+        loop = asyncio.get_running_loop()
+        logger.error(
+            "Unhandled error occurred",
+            error_type=type(error).__name__,
+            error_message=str(error),
+            exception=await loop.run_in_executor(None, _format_traceback, error)
+        )
+    else:
+        logger.error(
+            "Unhandled error occurred",
+            error_type=type(error).__name__,
+            error_message=str(error),
+            exc_info=error
+        )
     
     # Send generic error message to user
     if isinstance(update, Update) and update.effective_chat:
         try:
             await context.bot.send_message(
                 chat_id=update.effective_chat.id,
-                text="❌ Произошла ошибка. Попробуйте позже или обратитесь к администратору."
+                text=get_language_translator(_error_language(update, context)).translate("errors.general")
             )
         except Exception:
             # If we can't even send an error message, just log it
@@ -71,15 +120,12 @@ async def handle_rate_limit_error(update: Update, context: ContextTypes.DEFAULT_
             minutes = error.retry_after // 60
             time_msg = f"{minutes} минут"
         
-        message = f"🚫 **Превышен лимит запросов**\n\n" \
-                  f"Вы отправляете команды слишком часто.\n" \
-                  f"Попробуйте снова через {time_msg}.\n\n" \
-                  f"Действие: {error.action}"
+        message = _RATE_LIMIT_MESSAGE.format(time_msg=time_msg, action=html.escape(str(error.action)))
         
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
             text=message,
-            parse_mode='Markdown'
+            parse_mode='HTML'
         )
         
         logger.warning(
@@ -99,12 +145,10 @@ async def handle_admin_required_error(update: Update, context: ContextTypes.DEFA
         return
     
     try:
-        message = "🔒 **Доступ запрещен**\n\nЭта команда доступна только администраторам."
-        
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
-            text=message,
-            parse_mode='Markdown'
+            text=_ADMIN_REQUIRED_MESSAGE,
+            parse_mode='HTML'
         )
         
         logger.warning(
@@ -122,12 +166,12 @@ async def handle_validation_error(update: Update, context: ContextTypes.DEFAULT_
         return
     
     try:
-        message = f"❌ **Ошибка валидации**\n\n{str(error)}"
+        message = _VALIDATION_ERROR_MESSAGE.format(error=html.escape(str(error)))
         
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
             text=message,
-            parse_mode='Markdown'
+            parse_mode='HTML'
         )
         
         logger.warning(
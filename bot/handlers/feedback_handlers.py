@@ -2,57 +2,68 @@
 Feedback message handlers for user feedback submissions.
 """
 
+import asyncio
+import operator
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
 
-from bot.cache.ttl_cache import TTLCache
 from bot.config import Config
-from bot.database.client import DatabaseClient
 from bot.feedback import FeedbackManager
 from bot.handlers.callback_handlers import get_user_translator
 from bot.keyboards.keyboard_generators import create_main_menu
-from bot.utils.rate_limiter import MultiTierRateLimiter, rate_limit
+from bot.utils.rate_limiter import instrumented_handler
 from monitoring import get_logger, set_user_context, track_errors_async
 
 logger = get_logger(__name__)
 
+_get_deps = operator.itemgetter('db_client', 'user_cache', 'config')
+
+
+def get_feedback_manager(context: ContextTypes.DEFAULT_TYPE) -> FeedbackManager:
+    """Return the shared feedback manager, creating it on first use."""
+    feedback_manager = context.bot_data.get('feedback_manager')
+    if feedback_manager is None:
+        feedback_manager = FeedbackManager(
+            context.bot_data['config'],
+            context.bot_data['rate_limiter'],
+            context.bot_data['user_cache']
+        )
+        context.bot_data['feedback_manager'] = feedback_manager
+    return feedback_manager
+
 
-@rate_limit("general")
-@track_errors_async("handle_feedback_message")
-async def handle_feedback_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle feedback message from user."""
+@instrumented_handler("handle_feedback_message", action="general")
+async def handle_feedback_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
+    """
+    Handle feedback message from user.
+    
+    Returns:
+        True if the message belonged to an open feedback session
+    """
     if not update.message or not update.effective_user:
-        return
+        return False
     
     user = update.effective_user
     message_text = update.message.text
     
-    if not message_text or len(message_text.strip()) == 0:
-        return
-    
-    # Skip commands
-    if message_text.startswith('/'):
-        return
-    
-    set_user_context(user.id, user.username, user.first_name)
-    
-    # Get dependencies
-    config: Config = context.bot_data['config']
-    db_client: DatabaseClient = context.bot_data['db_client']
-    user_cache: TTLCache = context.bot_data['user_cache']
+    # Skip empty messages and commands
+    if not message_text or message_text[:1] == '/' or not message_text.strip():
+        return False
     
     # Check if feedback is enabled
+    db_client, user_cache, config = _get_deps(context.bot_data)
     if not config.is_feedback_enabled():
-        return
+        return False
     
-    # Initialize feedback manager
-    rate_limiter = MultiTierRateLimiter(feedback_rate_limit=config.feedback_rate_limit)
-    feedback_manager = FeedbackManager(config, rate_limiter, user_cache)
+    feedback_manager = get_feedback_manager(context)
     
     # Check if user has active feedback session
     session = await feedback_manager.get_feedback_session(user.id)
     if not session:
-        return  # No active feedback session, handle as regular message
+        return False  # No active feedback session, handle as regular message
+    
+    set_user_context(user.id, user.username, user.first_name)
     
     # Get user translator
     translator = await get_user_translator(user.id, db_client, user_cache)
@@ -63,6 +74,7 @@ async def handle_feedback_message(update: Update, context: ContextTypes.DEFAULT_
             await handle_feedback_description(
                 update, context, feedback_manager, translator, message_text
             )
+        return True
         
     except Exception as e:
         logger.error(f"Error handling feedback message: {e}")
@@ -71,11 +83,12 @@ async def handle_feedback_message(update: Update, context: ContextTypes.DEFAULT_
         await update.message.reply_text(
             translator.translate('feedback.error'),
             reply_markup=create_main_menu(
-                config.is_admin_configured() and user.id == config.admin_user_id, 
+                config.is_admin(user.id), 
                 translator
             ),
             parse_mode='Markdown'
         )
+        return False
 
 
 async def handle_feedback_description(
@@ -103,7 +116,7 @@ async def handle_feedback_description(
     
     # Store updated session
     await feedback_manager.user_cache.set(
-        f"feedback_session_{user.id}",
+        ("feedback_session", user.id),
         session,
         ttl=3600
     )
@@ -111,11 +124,12 @@ async def handle_feedback_description(
     # Show confirmation
     feedback_type = session.get("feedback_type", "general")
     
-    # Preview message
+    # Preview message; short descriptions are shown as is without copying
+    preview = description if len(description) <= 500 else f"{description[:500]}..."
     preview_text = (
         f"{translator.translate('feedback.confirm_title')}\n\n"
         f"**{translator.translate(f'feedback.{feedback_type}')}**\n\n"
-        f"*{description[:500]}{'...' if len(description) > 500 else ''}*"
+        f"*{preview}*"
     )
     
     keyboard = InlineKeyboardMarkup([
@@ -150,20 +164,16 @@ async def handle_feedback_confirmation(update: Update, context: ContextTypes.DEF
     await query.answer()
     
     # Get dependencies
-    config: Config = context.bot_data['config']
-    db_client: DatabaseClient = context.bot_data['db_client']
-    user_cache: TTLCache = context.bot_data['user_cache']
+    db_client, user_cache, config = _get_deps(context.bot_data)
     
-    # Get user translator
-    translator = await get_user_translator(user.id, db_client, user_cache)
-    
-    # Initialize feedback manager
-    rate_limiter = MultiTierRateLimiter(feedback_rate_limit=config.feedback_rate_limit)
-    feedback_manager = FeedbackManager(config, rate_limiter, user_cache)
+    feedback_manager = get_feedback_manager(context)
     
     if action == "confirm":
-        # Submit feedback
-        session = await feedback_manager.get_feedback_session(user.id)
+        # Load translator and session concurrently, then submit feedback
+        translator, session = await asyncio.gather(
+            get_user_translator(user.id, db_client, user_cache),
+            feedback_manager.get_feedback_session(user.id)
+        )
         if not session or "description" not in session:
             await query.edit_message_text(
                 translator.translate('feedback.session_expired'),
@@ -190,7 +200,7 @@ async def handle_feedback_confirmation(update: Update, context: ContextTypes.DEF
         await query.edit_message_text(
             success_text,
             reply_markup=create_main_menu(
-                config.is_admin_configured() and user.id == config.admin_user_id, 
+                config.is_admin(user.id), 
                 translator
             ),
             parse_mode='Markdown'
@@ -198,12 +208,15 @@ async def handle_feedback_confirmation(update: Update, context: ContextTypes.DEF
         
     elif action == "cancel":
         # Cancel feedback
-        await feedback_manager.clear_feedback_session(user.id)
+        translator, _ = await asyncio.gather(
+            get_user_translator(user.id, db_client, user_cache),
+            feedback_manager.clear_feedback_session(user.id)
+        )
         
         await query.edit_message_text(
             translator.translate('feedback.cancelled'),
             reply_markup=create_main_menu(
-                config.is_admin_configured() and user.id == config.admin_user_id, 
+                config.is_admin(user.id), 
                 translator
             ),
             parse_mode='Markdown'
@@ -4,16 +4,96 @@ Message handlers for activity logging.
 This module handles all text messages from users and logs them as activities.
 """
 
+import asyncio
+import logging
+import operator
+from contextlib import suppress
+from typing import Awaitable, Optional, Set, Tuple
+
 from telegram import Update
 from telegram.ext import Application, ContextTypes, MessageHandler, filters
 
 from bot.cache.ttl_cache import TTLCache
 from bot.config import Config
+from bot.database.activity_batcher import ActivityBatcher
 from bot.database.client import DatabaseClient
-from bot.utils.rate_limiter import MultiTierRateLimiter, rate_limit
-from monitoring import get_logger, set_user_context, track_errors_async
+from bot.database.user_operations import UserOperations
+from bot.handlers.callback_handlers import get_user_translator
+from bot.i18n import detect_user_language, get_language_translator
+from bot.questions import QuestionManager
+from bot.utils.rate_limiter import MultiTierRateLimiter, instrumented_handler
+from monitoring import get_logger, set_user_context
 
 logger = get_logger(__name__)
+# structlog filters by this stdlib logger's level
+_stdlib_logger = logging.getLogger(__name__)
+
+_get_deps = operator.itemgetter('db_client', 'user_cache', 'config')
+
+# Replies still being delivered; holds references so tasks are not collected early
+_pending_replies: Set[asyncio.Task] = set()
+
+
+def _on_reply_done(task: asyncio.Task) -> None:
+    """Release a finished reply task and log its failure, if any."""
+    _pending_replies.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        error = task.exception()
+        logger.error("Error sending reply", error=str(error), exc_info=error)
+
+
+def _reply_in_background(reply: Awaitable) -> None:
+    """Send a reply without holding the handler until Telegram answers."""
+    task = asyncio.create_task(reply)
+    _pending_replies.add(task)
+    task.add_done_callback(_on_reply_done)
+
+
+async def drain_pending_replies() -> None:
+    """Wait for replies still being sent; called on shutdown so none are dropped."""
+    if _pending_replies:
+        await asyncio.gather(*_pending_replies, return_exceptions=True)
+
+
+class _PlainTextFilter(filters.MessageFilter):
+    """Text messages that are not commands, checked in a single filter call."""
+    
+    def filter(self, message) -> bool:
+        text = message.text
+        return bool(text) and text[:1] != '/'
+
+
+PLAIN_TEXT = _PlainTextFilter(name="PLAIN_TEXT")
+
+# Processing status -> (emoji, translation key) for the reply
+_DEFAULT_STATUS_RESPONSE = ("✅", "activity.recorded")
+_STATUS_RESPONSES = {
+    "reply_success": _DEFAULT_STATUS_RESPONSE,
+    "old_notification_active_question": ("😅", "activity.recorded_old_notification"),
+    "old_notification_inactive_question": ("🕰️", "activity.recorded_old_question"),
+    "default_question": _DEFAULT_STATUS_RESPONSE,
+}
+# Sent when the full status reply fails; kept free of lookups that could fail too
+_FALLBACK_RESPONSE = "✅ Записано!"
+
+
+# Resolved once; the feedback package pulls in the GitHub client, so it is
+# imported on first use rather than with this module
+_feedback_message_handler = None
+
+
+def _get_feedback_message_handler():
+    """Return handle_feedback_message, importing it on first call."""
+    global _feedback_message_handler
+    if _feedback_message_handler is None:
+        from bot.handlers.feedback_handlers import handle_feedback_message
+        _feedback_message_handler = handle_feedback_message
+    return _feedback_message_handler
+
+
+def _ellipsize(text: str, limit: int) -> str:
+    """Truncate text to limit characters, marking the cut with an ellipsis."""
+    return text if len(text) <= limit else text[:limit] + "…"
 
 
 async def send_response_by_status(
@@ -40,12 +120,12 @@ async def send_response_by_status(
         
         # 1. Показать вопрос (если есть)
         if question_text:
-            display_question = question_text[:100] + "..." if len(question_text) > 100 else question_text
+            display_question = _ellipsize(question_text, 100)
             response_parts.append(f"📝 {translator.translate('activity.question_label')}: \"{display_question}\"")
         
         # 2. Показать ответ пользователя (если есть)
         if user_response_text:
-            display_answer = user_response_text[:150] + "..." if len(user_response_text) > 150 else user_response_text
+            display_answer = _ellipsize(user_response_text, 150)
             
             if is_voice:
                 response_parts.append(f"🎤 {translator.translate('activity.transcription_label')}: \"{display_answer}\"")
@@ -53,16 +133,8 @@ async def send_response_by_status(
                 response_parts.append(f"💬 {translator.translate('activity.answer_label')}: \"{display_answer}\"")
         
         # 3. Статус операции
-        if status == "reply_success":
-            response_parts.append("✅ " + translator.translate('activity.recorded'))
-        elif status == "old_notification_active_question":
-            response_parts.append("😅 " + translator.translate('activity.recorded_old_notification'))
-        elif status == "old_notification_inactive_question":
-            response_parts.append("🕰️ " + translator.translate('activity.recorded_old_question'))
-        elif status == "default_question":
-            response_parts.append("✅ " + translator.translate('activity.recorded'))
-        else:
-            response_parts.append("✅ " + translator.translate('activity.recorded'))
+        emoji, key = _STATUS_RESPONSES.get(status, _DEFAULT_STATUS_RESPONSE)
+        response_parts.append(f"{emoji} {translator.translate(key)}")
         
         # Объединяем все части
         response_text = "\n".join(response_parts)
@@ -71,121 +143,156 @@ async def send_response_by_status(
     except Exception as e:
         logger.error(f"Error sending status response: {e}")
         # Fallback response
-        try:
-            await message.reply_text("✅ " + translator.translate('activity.recorded'))
-        except:
-            await message.reply_text("✅ Записано!")
+        with suppress(Exception):
+            await message.reply_text(_FALLBACK_RESPONSE)
+
+
+async def _resolve_question_separately(
+    user,
+    user_ops: UserOperations,
+    question_manager: QuestionManager,
+    user_cache: TTLCache,
+    reply_to_message_id: Optional[int]
+) -> Tuple[Optional[int], str]:
+    """Register user and resolve the answered question with individual queries."""
+    # Register user unless already confirmed recently
+    user_exists_key = ("user_exists", user.id)
+    if await user_cache.get(user_exists_key) is not True:
+        await user_ops.ensure_user_exists(
+            tg_id=user.id,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name
+        )
+        await user_cache.set(user_exists_key, True, 3600)
+    
+    # Ensure user has default question
+    await question_manager.ensure_user_has_default_question(user.id)
+    
+    # Determine which question this message responds to
+    return await question_manager.determine_question_for_message(
+        user.id, reply_to_message_id
+    )
 
 
-@rate_limit("general")
-@track_errors_async("handle_text_message")
+async def resolve_message_question(
+    user,
+    user_ops: UserOperations,
+    question_manager: QuestionManager,
+    user_cache: TTLCache,
+    reply_to_message_id: Optional[int]
+) -> Tuple[Optional[int], str, Optional[str]]:
+    """
+    Register the user and pick the question an incoming message answers.
+    
+    Returns:
+        Tuple of (question_id, status, question_text); question_text is None
+        when it was not fetched along the way
+    """
+    # Register user, ensure default question and pick the question in one call
+    resolved = await question_manager.question_ops.handle_incoming_message(
+        user.id, user.username, user.first_name, user.last_name, reply_to_message_id
+    )
+    if resolved:
+        return resolved['question_id'], resolved['status'], resolved['question_text']
+    
+    # Function not deployed or failed - fall back to separate queries
+    question_id, status = await _resolve_question_separately(
+        user, user_ops, question_manager, user_cache, reply_to_message_id
+    )
+    return question_id, status, None
+
+
+@instrumented_handler("handle_text_message", action="general")
 async def handle_text_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle text messages and log them as user activities."""
     user = update.effective_user
     message = update.message
     
-    if not user or not message or not message.text:
+    # Skip empty messages and commands (start with /)
+    if not user or not message or not message.text or message.text[:1] == '/':
         return
     
-    # Skip if message is a command (starts with /)
-    if message.text.startswith('/'):
-        return
-        
     set_user_context(user.id, user.username, user.first_name)
+    log = logger.bind(user_id=user.id, username=user.username)
     
     # Get dependencies
-    db_client: DatabaseClient = context.bot_data['db_client']
-    user_cache: TTLCache = context.bot_data['user_cache']
+    db_client, user_cache, config = _get_deps(context.bot_data)
     
     try:
-        # Check if user has active feedback session first
-        config: Config = context.bot_data['config']
-        
-        if config.is_feedback_enabled():
-            from bot.handlers.feedback_handlers import handle_feedback_message
-
-            # Try to handle as feedback message first
-            await handle_feedback_message(update, context)
-            
-            # Check if message was consumed by feedback handler
-            from bot.feedback import FeedbackManager
-            from bot.utils.rate_limiter import MultiTierRateLimiter
-            
-            rate_limiter = MultiTierRateLimiter(feedback_rate_limit=config.feedback_rate_limit)
-            feedback_manager = FeedbackManager(config, rate_limiter, user_cache)
-            session = await feedback_manager.get_feedback_session(user.id)
-            
-            if session:
-                # Message was handled by feedback system
+        # Route to the feedback handler only if the user has an open session;
+        # the session lives in user_cache under the FeedbackManager's key
+        if config.is_feedback_enabled() and await user_cache.get(("feedback_session", user.id)):
+            if await _get_feedback_message_handler()(update, context):
                 return
         
-        # Ensure user exists in database first
-        from bot.database.user_operations import UserOperations
-        user_ops = UserOperations(db_client, user_cache)
+        # Reject oversized activities without touching the database; feedback
+        # sessions are checked first since feedback may legitimately be long,
+        # and the reply uses the Telegram language instead of the stored setting
+        if len(message.text) > config.max_activity_length:
+            log.info("Activity text too long", message_length=len(message.text))
+            translator = get_language_translator(detect_user_language(user))
+            _reply_in_background(message.reply_text(
+                translator.translate('activity.too_long', max_length=config.max_activity_length)
+            ))
+            return
         
-        # Register/update user
-        await user_ops.ensure_user_exists(
-            tg_id=user.id,
-            username=user.username,
-            first_name=user.first_name,
-            last_name=user.last_name
-        )
-        
-        # Initialize question manager and ensure user has default question
-        from bot.questions import QuestionManager
-        question_manager = QuestionManager(db_client, user_cache)
-        await question_manager.ensure_user_has_default_question(user.id)
+        user_ops: UserOperations = context.bot_data['user_ops']
+        question_manager: QuestionManager = context.bot_data['question_manager']
         
-        # Determine which question this message responds to
         reply_to_message_id = None
         if message.reply_to_message:
             reply_to_message_id = message.reply_to_message.message_id
         
-        question_id, status = await question_manager.determine_question_for_message(
-            user.id, reply_to_message_id
+        question_id, status, question_text = await resolve_message_question(
+            user, user_ops, question_manager, user_cache, reply_to_message_id
         )
         
         if question_id:
-            # Log the activity with question linkage
-            success = await user_ops.log_activity(user.id, message.text, question_id=question_id)
+            # Log the activity with question linkage, batched with concurrent messages
+            activity_batcher: ActivityBatcher = context.bot_data.get('activity_batcher')
+            if activity_batcher:
+                success = await activity_batcher.log(user.id, message.text, question_id=question_id)
+            else:
+                success = await user_ops.log_activity(user.id, message.text, question_id=question_id)
             
             if success:
-                logger.info("Activity logged successfully", 
-                           user_id=user.id, 
-                           question_id=question_id,
-                           message_length=len(message.text))
+                if _stdlib_logger.isEnabledFor(logging.INFO):
+                    log.info("Activity logged successfully", 
+                             question_id=question_id,
+                             message_length=len(message.text))
                 
                 # Get user translator for response
-                from bot.handlers.callback_handlers import get_user_translator
                 translator = await get_user_translator(user.id, db_client, user_cache)
                 
-                # Получаем текст вопроса
-                question = await question_manager.question_ops.get_question_by_id(question_id)
-                question_text = question.get('question_text') if question else None
+                if question_text is None:
+                    # Получаем текст вопроса
+                    question = await question_manager.question_ops.get_question_by_id(question_id)
+                    question_text = question.get('question_text') if question else None
                 
                 # Send status-specific response with question and answer info
-                await send_response_by_status(
+                _reply_in_background(send_response_by_status(
                     message=message,
                     status=status, 
                     translator=translator,
                     question_text=question_text,
                     user_response_text=message.text,  # Всегда дублируем ответ
                     is_voice=False
-                )
+                ))
                 
             else:
-                logger.warning("Failed to log activity", user_id=user.id)
-                await message.reply_text(
+                log.warning("Failed to log activity")
+                _reply_in_background(message.reply_text(
                     "❌ Не удалось записать активность. Попробуйте ещё раз."
-                )
+                ))
         else:
-            logger.error("No question found for user", user_id=user.id)
-            await message.reply_text(
+            log.error("No question found for user")
+            _reply_in_background(message.reply_text(
                 "❌ Ошибка системы вопросов. Попробуйте команду /start"
-            )
+            ))
             
     except Exception as e:
-        logger.error(f"Error handling text message: {e}", user_id=user.id)
+        log.error("Error handling text message", error=str(e), exc_info=e)
 
 
 def setup_message_handlers(
@@ -202,14 +309,17 @@ def setup_message_handlers(
         'db_client': db_client,
         'user_cache': user_cache,
         'rate_limiter': rate_limiter,
-        'config': config
+        'config': config,
+        'user_ops': UserOperations(db_client, user_cache),
+        'question_manager': QuestionManager(db_client, user_cache),
+        'activity_batcher': ActivityBatcher(db_client)
     })
     
+    if config.is_feedback_enabled():
+        _get_feedback_message_handler()
+    
     # Register text message handler (excluding commands)
-    text_handler = MessageHandler(
-        filters.TEXT & ~filters.COMMAND,
-        handle_text_message
-    )
+    text_handler = MessageHandler(PLAIN_TEXT, handle_text_message)
     application.add_handler(text_handler, group=1)  # Lower priority than conversations
     
     logger.info("Message handlers registered successfully")
\ No newline at end of file
@@ -1,7 +1,10 @@
 """
 Rate limiting handler utilities.
 """
+from functools import lru_cache
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes
 
 from bot.utils.exceptions import RateLimitExceeded
@@ -10,6 +13,85 @@ from monitoring import get_logger
 
 logger = get_logger(__name__)
 
+# User-friendly action names
+_ACTION_NAMES = {
+    "general": "общих команд",
+    "friend_request": "запросов в друзья",
+    "settings": "изменений настроек", 
+    "discovery": "поиска друзей",
+    "admin": "админских команд",
+    "callback": "нажатий кнопок"
+}
+
+# Shared by every notification; markup objects are immutable
+_RATE_LIMIT_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🏠 Главное меню", callback_data="menu_main")],
+    [InlineKeyboardButton("❓ Помощь", callback_data="menu_help")]
+])
+
+
+# (threshold seconds, unit label, divisor), largest unit first
+_RETRY_UNITS = (
+    (3600, "ч.", 3600),
+    (60, "мин.", 60),
+    (0, "сек.", 1)
+)
+
+
+def _format_retry_after(retry_after: int) -> str:
+    """Format retry delay in the largest whole unit."""
+    for threshold, label, divisor in _RETRY_UNITS:
+        if retry_after >= threshold:
+            return f"{retry_after // divisor} {label}"
+    return f"{retry_after} сек."
+
+
+@lru_cache(maxsize=64)
+def _render_rate_limit_message(
+    action: str,
+    current: int,
+    max_requests: int,
+    retry_after: int,
+    window_seconds: int,
+    markdown: bool = True
+) -> str:
+    """Build the rate limit notification, with or without Markdown markup."""
+    time_msg = _format_retry_after(retry_after)
+    action_display = _ACTION_NAMES.get(action, action)
+    title = f"Превышен лимит {action_display}"
+    footer = "Лимиты защищают бот от перегрузки."
+    if markdown:
+        title = f"**{title}**"
+        footer = f"_{footer}_"
+    
+    return f"🚫 {title}\n\n" \
+           f"📊 Использовано: {current}/{max_requests}\n" \
+           f"⏰ Попробуйте через: {time_msg}\n" \
+           f"🔄 Окно сброса: {window_seconds} сек.\n\n" \
+           f"{footer}"
+
+
+async def _send_rate_limit_message(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str, parse_mode):
+    """Send the notification, editing the callback message when possible."""
+    if update.callback_query:
+        try:
+            await update.callback_query.edit_message_text(
+                text=text,
+                reply_markup=_RATE_LIMIT_KEYBOARD,
+                parse_mode=parse_mode
+            )
+            return
+        except Exception:
+            # If edit fails, answer callback and send new message
+            await update.callback_query.answer("Превышен лимит запросов!")
+    
+    await context.bot.send_message(
+        chat_id=update.effective_chat.id,
+        text=text,
+        reply_markup=_RATE_LIMIT_KEYBOARD,
+        parse_mode=parse_mode
+    )
+
 
 async def handle_rate_limit_error(update: Update, context: ContextTypes.DEFAULT_TYPE, error: RateLimitExceeded):
     """Handle rate limit exceeded with user-friendly message."""
@@ -22,66 +104,30 @@ async def handle_rate_limit_error(update: Update, context: ContextTypes.DEFAULT_
         user_id = update.effective_user.id if update.effective_user else 0
         stats = rate_limiter.get_usage_stats(user_id, error.action)
         
-        # Format time message
-        if error.retry_after < 60:
-            time_msg = f"{error.retry_after} сек."
-        elif error.retry_after < 3600:
-            minutes = error.retry_after // 60
-            time_msg = f"{minutes} мин."
-        else:
-            hours = error.retry_after // 3600
-            time_msg = f"{hours} ч."
-        
-        # Create user-friendly action names
-        action_names = {
-            "general": "общих команд",
-            "friend_request": "запросов в друзья",
-            "settings": "изменений настроек", 
-            "discovery": "поиска друзей",
-            "admin": "админских команд",
-            "callback": "нажатий кнопок"
-        }
-        
-        action_display = action_names.get(error.action, error.action)
-        
-        # Create message with emoji and formatting
-        message = f"🚫 **Превышен лимит {action_display}**\n\n" \
-                  f"📊 Использовано: {stats['current_count']}/{stats['max_requests']}\n" \
-                  f"⏰ Попробуйте через: {time_msg}\n" \
-                  f"🔄 Окно сброса: {stats['window_seconds']} сек.\n\n" \
-                  f"_Лимиты защищают бот от перегрузки._"
-        
-        # Add helpful keyboard
-        keyboard = [
-            [InlineKeyboardButton("🏠 Главное меню", callback_data="menu_main")],
-            [InlineKeyboardButton("❓ Помощь", callback_data="menu_help")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        message_args = (
+            error.action,
+            stats['current_count'],
+            stats['max_requests'],
+            error.retry_after,
+            stats['window_seconds']
+        )
         
-        # Send message (try edit first, then send new)
-        if update.callback_query:
+        # Chats where Markdown was rejected once get plain text straight away
+        chat_data = context.chat_data if context.chat_data is not None else {}
+        if chat_data.get('no_markdown'):
+            await _send_rate_limit_message(
+                update, context, _render_rate_limit_message(*message_args, markdown=False), None
+            )
+        else:
             try:
-                await update.callback_query.edit_message_text(
-                    text=message,
-                    reply_markup=reply_markup,
-                    parse_mode='Markdown'
+                await _send_rate_limit_message(
+                    update, context, _render_rate_limit_message(*message_args), 'Markdown'
                 )
-            except Exception:
-                # If edit fails, answer callback and send new message
-                await update.callback_query.answer("Превышен лимит запросов!")
-                await context.bot.send_message(
-                    chat_id=update.effective_chat.id,
-                    text=message,
-                    reply_markup=reply_markup,
-                    parse_mode='Markdown'
+            except BadRequest:
+                chat_data['no_markdown'] = True
+                await _send_rate_limit_message(
+                    update, context, _render_rate_limit_message(*message_args, markdown=False), None
                 )
-        else:
-            await context.bot.send_message(
-                chat_id=update.effective_chat.id,
-                text=message,
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
-            )
         
         logger.info(
             "Rate limit notification sent",
@@ -102,4 +148,4 @@ async def handle_rate_limit_error(update: Update, context: ContextTypes.DEFAULT_
                 text=f"🚫 Слишком много запросов. Попробуйте через {error.retry_after} сек."
             )
         except Exception:
-            pass  # Give up if even simple message fails
\ No newline at end of file
+            pass  # Give up if even simple message fails
@@ -7,16 +7,21 @@ This module handles voice messages by:
 3. Processing transcribed text as regular messages
 """
 
+import asyncio
 import os
-import tempfile
 from typing import Optional
-import aiofiles
+
 from telegram import Update, Voice
+from telegram.constants import ChatAction
 from telegram.ext import Application, ContextTypes, MessageHandler, filters
 
 from bot.cache.ttl_cache import TTLCache
 from bot.config import Config
 from bot.database.client import DatabaseClient
+from bot.database.user_operations import UserOperations
+from bot.handlers.callback_handlers import get_user_translator
+from bot.handlers.message_handlers import resolve_message_question, send_response_by_status
+from bot.questions import QuestionManager
 from bot.services.whisper_client import (
     WhisperClient, 
     WhisperClientError, 
@@ -29,18 +34,19 @@ from monitoring import get_logger, set_user_context, track_errors_async
 
 logger = get_logger(__name__)
 
+# Transcriptions are reused for resent or forwarded voice messages for a day
+TRANSCRIPTION_CACHE_TTL_SECONDS = 24 * 3600
 
-async def download_voice_file(voice: Voice, bot, temp_dir: str) -> tuple[str, str]:
+async def download_voice_bytes(voice: Voice, bot) -> tuple[bytes, str]:
     """
-    Download voice file from Telegram.
+    Download voice file from Telegram into memory.
     
     Args:
         voice: Telegram Voice object
         bot: Telegram bot instance
-        temp_dir: Temporary directory for file storage
         
     Returns:
-        Tuple of (file_path, file_extension)
+        Tuple of (file_content, file_extension)
         
     Raises:
         Exception: If download fails
@@ -56,60 +62,58 @@ async def download_voice_file(voice: Voice, bot, temp_dir: str) -> tuple[str, st
             if ext:
                 file_extension = ext.lstrip('.')
         
-        # Create temporary file
-        temp_file_path = os.path.join(temp_dir, f"{voice.file_id}.{file_extension}")
-        
-        # Download file
-        await file.download_to_drive(temp_file_path)
+        # Voice messages are capped at a few MB, so no temp file is needed
+        content = bytes(await file.download_as_bytearray())
         
-        logger.info(f"Voice file downloaded: {temp_file_path}, size: {os.path.getsize(temp_file_path)} bytes")
+        logger.info("Voice file downloaded", file_id=voice.file_id, extension=file_extension, size=len(content))
         
-        return temp_file_path, file_extension
+        return content, file_extension
         
     except Exception as e:
         logger.error(f"Failed to download voice file {voice.file_id}: {e}")
         raise
 
 
-async def send_voice_processing_message(update: Update, translator) -> int:
+async def send_voice_processing_action(update: Update, bot) -> None:
     """
-    Send temporary processing message to user.
+    Show the typing indicator while the voice message is processed.
+    
+    Unlike a placeholder message, the chat action needs no edit or delete afterwards.
     
     Args:
         update: Telegram update
-        translator: User translator instance
-        
-    Returns:
-        Message ID of the processing message
+        bot: Bot instance
     """
     try:
-        processing_text = translator.translate('voice.processing')
-        message = await update.message.reply_text(processing_text)
-        return message.message_id
+        await bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
     except Exception as e:
-        logger.error(f"Failed to send processing message: {e}")
-        return None
+        logger.error(f"Failed to send processing action: {e}")
 
 
-async def update_processing_message(update: Update, message_id: int, text: str, bot) -> None:
+async def send_voice_error(update: Update, translator, key: str, **kwargs) -> None:
     """
-    Update processing message with final result.
+    Reply to the voice message with a translated error.
+    
+    Translator memoizes resolved templates per language, so only the
+    branch that fires pays for a lookup.
     
     Args:
         update: Telegram update
-        message_id: ID of message to update
-        text: New text for the message
-        bot: Bot instance
+        translator: User translator instance
+        key: Translation key of the error
+        **kwargs: Template variables for the error text
     """
     try:
-        if message_id:
-            await bot.edit_message_text(
-                chat_id=update.effective_chat.id,
-                message_id=message_id,
-                text=text
-            )
+        await update.message.reply_text(translator.translate(key, **kwargs))
     except Exception as e:
-        logger.error(f"Failed to update processing message: {e}")
+        logger.error(f"Failed to send voice error message: {e}")
+
+
+def _log_task_failure(task: asyncio.Task) -> None:
+    """Log a background task's failure; also marks it retrieved if the handler never awaits it."""
+    if not task.cancelled() and task.exception() is not None:
+        error = task.exception()
+        logger.warning("Voice background task failed", task=task.get_name(), error=str(error), exc_info=error)
 
 
 @rate_limit("voice_message")
@@ -129,160 +133,152 @@ async def handle_voice_message(update: Update, context: ContextTypes.DEFAULT_TYP
     user_cache: TTLCache = context.bot_data['user_cache']
     config: Config = context.bot_data['config']
     
+    whisper_client: Optional[WhisperClient] = context.bot_data.get('whisper_client')
+    
+    # Forwards and retries reuse Telegram's stable file_unique_id
+    transcription_cache: Optional[TTLCache] = context.bot_data.get('transcription_cache')
+    transcription_key = ("voice_transcription", message.voice.file_unique_id)
+    cached_transcription = None
+    if transcription_cache is not None:
+        cached_transcription = await transcription_cache.get(transcription_key)
+    
+    # Start the download right away; it needs neither the translator nor the processing message.
+    # Both background tasks log their own failures, since an early exit may never await them
+    download_task = None
+    if whisper_client is not None and cached_transcription is None:
+        download_task = asyncio.create_task(
+            download_voice_bytes(message.voice, context.bot), name="voice_download"
+        )
+        download_task.add_done_callback(_log_task_failure)
+    
+    # Register the user and pick the question while the audio downloads and
+    # transcribes; only logging the activity needs the transcribed text
+    question_task = None
+    if whisper_client is not None:
+        reply_to_message_id = None
+        if message.reply_to_message:
+            reply_to_message_id = message.reply_to_message.message_id
+        question_task = asyncio.create_task(resolve_message_question(
+            user,
+            context.bot_data['user_ops'],
+            context.bot_data['question_manager'],
+            user_cache,
+            reply_to_message_id
+        ), name="voice_question")
+        question_task.add_done_callback(_log_task_failure)
+    
     # Get user translator
-    from bot.handlers.callback_handlers import get_user_translator
     translator = await get_user_translator(user.id, db_client, user_cache)
     
-    # Send processing message
-    processing_message_id = await send_voice_processing_message(update, translator)
-    
-    # Create temporary directory for audio file
-    temp_dir = None
-    temp_file_path = None
+    # Show that the message is being processed
+    await send_voice_processing_action(update, context.bot)
     
     try:
         # Check if Whisper is configured
-        if not config.openai_api_key:
+        if whisper_client is None:
             logger.warning(f"OPENAI_API_KEY not configured for user {user.id}")
-            error_text = translator.translate('voice.error_not_configured')
-            await update_processing_message(update, processing_message_id, error_text, context.bot)
+            await send_voice_error(update, translator, 'voice.error_not_configured')
             return
         
-        logger.info(f"Processing voice message for user {user.id}, API key configured: {bool(config.openai_api_key)}, duration: {message.voice.duration}s")
+        logger.info("Processing voice message", user_id=user.id, duration=message.voice.duration)
         
-        # Create WhisperClient
-        whisper_client = WhisperClient(
-            api_key=config.openai_api_key,
-            model=config.whisper_model,
-            max_file_size_mb=config.max_voice_file_size_mb,
-            max_duration_seconds=config.max_voice_duration_seconds
-        )
-        
-        # Check if file format is supported
-        file_extension = 'oga'  # Default for Telegram voice messages
-        if not whisper_client.is_format_supported(file_extension):
-            error_text = translator.translate('voice.error_unsupported_format')
-            await update_processing_message(update, processing_message_id, error_text, context.bot)
-            return
-        
-        # Create temporary directory
-        temp_dir = tempfile.mkdtemp(prefix='voice_')
-        
-        # Download voice file
-        try:
-            temp_file_path, file_extension = await download_voice_file(
-                message.voice, 
-                context.bot, 
-                temp_dir
-            )
-        except Exception as e:
-            logger.error(f"Failed to download voice file: {e}")
-            error_text = translator.translate('voice.error_download')
-            await update_processing_message(update, processing_message_id, error_text, context.bot)
-            return
-        
-        # Determine language for transcription
-        # Use user's preferred language if available, otherwise auto-detect
-        from bot.database.user_operations import UserOperations
-        user_ops = UserOperations(db_client, user_cache)
-        user_settings = await user_ops.get_user_settings(user.id)
-        
-        # Let Whisper auto-detect language for better compatibility
-        transcription_language = None
-        # if user_settings and user_settings.get('language'):
-        #     # Map bot language codes to Whisper language codes
-        #     lang_map = {'ru': 'ru', 'en': 'en', 'es': 'es'}
-        #     transcription_language = lang_map.get(user_settings['language'])
-        
-        # Transcribe audio
-        try:
-            transcribed_text = await whisper_client.transcribe_audio(
-                temp_file_path,
-                language=transcription_language,
-                duration_seconds=message.voice.duration
-            )
+        if cached_transcription is not None:
+            logger.info("Using cached transcription", file_unique_id=message.voice.file_unique_id)
+            transcribed_text = cached_transcription
+        else:
+            # Check if file format is supported
+            file_extension = 'oga'  # Default for Telegram voice messages
+            if not whisper_client.is_format_supported(file_extension):
+                await send_voice_error(update, translator, 'voice.error_unsupported_format')
+                return
             
-            if not transcribed_text or not transcribed_text.strip():
-                error_text = translator.translate('voice.error_empty_transcription')
-                await update_processing_message(update, processing_message_id, error_text, context.bot)
+            # Download voice file
+            try:
+                audio_data, file_extension = await download_task
+            except Exception as e:
+                logger.error(f"Failed to download voice file: {e}")
+                await send_voice_error(update, translator, 'voice.error_download')
                 return
             
-        except AudioTooLargeError:
-            error_text = translator.translate(
-                'voice.error_too_large',
-                max_size=config.max_voice_file_size_mb
-            )
-            await update_processing_message(update, processing_message_id, error_text, context.bot)
-            return
+            # Let Whisper auto-detect the spoken language; it can differ from the UI language
+            transcription_language = None
             
-        except AudioTooLongError:
-            error_text = translator.translate(
-                'voice.error_too_long',
-                max_duration=config.max_voice_duration_seconds
-            )
-            await update_processing_message(update, processing_message_id, error_text, context.bot)
-            return
+            # Transcribe audio
+            try:
+                transcribed_text = await whisper_client.transcribe_audio_bytes(
+                    audio_data,
+                    f"{message.voice.file_id}.{file_extension}",
+                    language=transcription_language,
+                    duration_seconds=message.voice.duration
+                )
             
-        except TranscriptionError as e:
-            logger.error(f"Transcription error details: {e}")
-            error_text = translator.translate('voice.error_transcription')
-            await update_processing_message(update, processing_message_id, error_text, context.bot)
-            return
+                if not transcribed_text or not transcribed_text.strip():
+                    await send_voice_error(update, translator, 'voice.error_empty_transcription')
+                    return
             
-        except Exception as e:
-            logger.error(f"Unexpected error during transcription: {type(e).__name__}: {e}")
-            # Check if it's an API key issue
-            if "api" in str(e).lower() or "key" in str(e).lower() or "auth" in str(e).lower():
-                error_text = translator.translate('voice.error_not_configured')
-            else:
-                error_text = translator.translate('voice.error_api')
-            await update_processing_message(update, processing_message_id, error_text, context.bot)
-            return
+            except AudioTooLargeError:
+                await send_voice_error(
+                    update, translator, 'voice.error_too_large', max_size=config.max_voice_file_size_mb
+                )
+                return
+            
+            except AudioTooLongError:
+                await send_voice_error(
+                    update, translator, 'voice.error_too_long', max_duration=config.max_voice_duration_seconds
+                )
+                return
+            
+            except TranscriptionError as e:
+                logger.error(f"Transcription error details: {e}")
+                await send_voice_error(update, translator, 'voice.error_transcription')
+                return
+            
+            except Exception as e:
+                logger.error(f"Unexpected error during transcription: {type(e).__name__}: {e}")
+                # Check if it's an API key issue
+                error_message = str(e).lower()
+                if "api" in error_message or "key" in error_message or "auth" in error_message:
+                    error_key = 'voice.error_not_configured'
+                else:
+                    error_key = 'voice.error_api'
+                await send_voice_error(update, translator, error_key)
+                return
+            
+            if transcription_cache is not None:
+                await transcription_cache.set(transcription_key, transcribed_text)
         
         # Process transcribed text as regular message
         try:
-            # Ensure user exists in database
-            await user_ops.ensure_user_exists(
-                tg_id=user.id,
-                username=user.username,
-                first_name=user.first_name,
-                last_name=user.last_name
-            )
-            
-            # Initialize question manager and ensure user has default question
-            from bot.questions import QuestionManager
-            question_manager = QuestionManager(db_client, user_cache)
-            await question_manager.ensure_user_has_default_question(user.id)
+            user_ops = context.bot_data['user_ops']
+            question_manager = context.bot_data['question_manager']
             
-            # Determine which question this message responds to
-            reply_to_message_id = None
-            if message.reply_to_message:
-                reply_to_message_id = message.reply_to_message.message_id
-            
-            question_id, status = await question_manager.determine_question_for_message(
-                user.id, reply_to_message_id
-            )
+            # Started alongside the download
+            question_id, status, question_text = await question_task
             
             if question_id:
-                # Log the transcribed text as activity
-                success = await user_ops.log_activity(
-                    user.id, 
-                    transcribed_text, 
-                    question_id=question_id
-                )
+                # Log the transcribed text as activity, batched with text messages
+                activity_batcher = context.bot_data.get('activity_batcher')
+                if activity_batcher:
+                    success = await activity_batcher.log(user.id, transcribed_text, question_id=question_id)
+                else:
+                    success = await user_ops.log_activity(
+                        user.id, 
+                        transcribed_text, 
+                        question_id=question_id
+                    )
                 
                 if success:
                     logger.info(
-                        f"Voice message transcribed and logged: user_id={user.id}, "
-                        f"question_id={question_id}, transcription_length={len(transcribed_text)}"
+                        "Voice message transcribed and logged",
+                        user_id=user.id,
+                        question_id=question_id,
+                        transcription_length=len(transcribed_text)
                     )
                     
-                    # Получаем текст вопроса
-                    question = await question_manager.question_ops.get_question_by_id(question_id)
-                    question_text = question.get('question_text') if question else None
-                    
-                    # Импортируем функцию из message_handlers
-                    from bot.handlers.message_handlers import send_response_by_status
+                    if question_text is None:
+                        # Получаем текст вопроса
+                        question = await question_manager.question_ops.get_question_by_id(question_id)
+                        question_text = question.get('question_text') if question else None
                     
                     # Формируем ответ с полной информацией
                     await send_response_by_status(
@@ -293,48 +289,24 @@ async def handle_voice_message(update: Update, context: ContextTypes.DEFAULT_TYP
                         user_response_text=transcribed_text,  # Расшифрованный текст
                         is_voice=True  # Помечаем как голосовое сообщение
                     )
-                    
-                    # Удаляем временное сообщение о процессинге
-                    try:
-                        if processing_message_id:
-                            await context.bot.delete_message(
-                                chat_id=update.effective_chat.id,
-                                message_id=processing_message_id
-                            )
-                    except Exception as delete_error:
-                        logger.warning(f"Failed to delete processing message: {delete_error}")
                 else:
-                    error_text = translator.translate('voice.error_save')
-                    await update_processing_message(update, processing_message_id, error_text, context.bot)
+                    await send_voice_error(update, translator, 'voice.error_save')
             else:
-                error_text = translator.translate('voice.error_no_question')
-                await update_processing_message(update, processing_message_id, error_text, context.bot)
+                await send_voice_error(update, translator, 'voice.error_no_question')
                 
         except Exception as e:
             logger.error(f"Error processing transcribed text: {e}")
-            error_text = translator.translate('voice.error_processing')
-            await update_processing_message(update, processing_message_id, error_text, context.bot)
+            await send_voice_error(update, translator, 'voice.error_processing')
             
     except Exception as e:
         logger.error(f"Unexpected error in voice message handling: {e}")
-        error_text = translator.translate('voice.error_general')
-        await update_processing_message(update, processing_message_id, error_text, context.bot)
-        
+        await send_voice_error(update, translator, 'voice.error_general')
+    
     finally:
-        # Clean up temporary files
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.remove(temp_file_path)
-                logger.debug(f"Temporary file removed: {temp_file_path}")
-            except Exception as e:
-                logger.warning(f"Failed to remove temporary file {temp_file_path}: {e}")
-        
-        if temp_dir and os.path.exists(temp_dir):
-            try:
-                os.rmdir(temp_dir)
-                logger.debug(f"Temporary directory removed: {temp_dir}")
-            except Exception as e:
-                logger.warning(f"Failed to remove temporary directory {temp_dir}: {e}")
+        # Error returns leave the download or question lookup unconsumed
+        for task in (download_task, question_task):
+            if task is not None and not task.done():
+                task.cancel()
 
 
 def setup_voice_handlers(
@@ -353,11 +325,26 @@ def setup_voice_handlers(
         'rate_limiter': rate_limiter,
         'config': config
     })
+    # Shared with the text message handlers when those are set up first
+    application.bot_data.setdefault('user_ops', UserOperations(db_client, user_cache))
+    application.bot_data.setdefault('question_manager', QuestionManager(db_client, user_cache))
+    
+    # One client for all voice messages so its HTTP connections are reused
+    if config.openai_api_key:
+        application.bot_data['whisper_client'] = WhisperClient(
+            api_key=config.openai_api_key,
+            model=config.whisper_model,
+            max_file_size_mb=config.max_voice_file_size_mb,
+            max_duration_seconds=config.max_voice_duration_seconds
+        )
+        application.bot_data['transcription_cache'] = TTLCache(ttl_seconds=TRANSCRIPTION_CACHE_TTL_SECONDS)
     
-    # Register voice message handler
+    # Register voice message handler; block=False runs each voice message as
+    # its own task so multi-second Whisper calls do not hold up the update loop
     voice_handler = MessageHandler(
         filters.VOICE,
-        handle_voice_message
+        handle_voice_message,
+        block=False
     )
     application.add_handler(voice_handler, group=1)  # Same priority as text messages
     
@@ -4,14 +4,39 @@ Internationalization (i18n) package for Doyobi Diary.
 Provides multi-language support with automatic language detection
 and fallback mechanisms.
 """
+import importlib
 
-from .language_detector import LanguageDetector, detect_user_language
-from .translator import Translator, _, get_translator
+# Public name -> submodule; submodules load on first access so that
+# importing the detector alone does not load the translation catalogs
+_LAZY_ATTRS = {
+    'Translator': '.translator',
+    'get_translator': '.translator',
+    'get_language_translator': '.translator',
+    '_': '.translator',
+    'LanguageDetector': '.language_detector',
+    'detect_user_language': '.language_detector',
+}
 
 __all__ = [
     'Translator',
-    'get_translator', 
+    'get_translator',
+    'get_language_translator',
     '_',
     'LanguageDetector',
     'detect_user_language'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name: str):
+    """Resolve public names from their submodule on first use."""
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,6 +1,8 @@
 """
 Language detection utilities for automatic locale assignment.
 """
+import re
+from functools import lru_cache
 from typing import Optional
 
 from telegram import User
@@ -41,25 +43,8 @@ class LanguageDetector:
         """
         if not user:
             return cls.DEFAULT_LANGUAGE
-            
-        # Try to get language from user.language_code
-        user_lang = user.language_code
-        if user_lang:
-            # Check direct match
-            if user_lang in cls.SUPPORTED_LANGUAGES:
-                detected = cls.SUPPORTED_LANGUAGES[user_lang]
-                logger.debug(f"Language detected from Telegram: {user_lang} -> {detected}")
-                return detected
-            
-            # Check prefix match (e.g., 'en-US' -> 'en')
-            lang_prefix = user_lang.split('-')[0].lower()
-            if lang_prefix in cls.SUPPORTED_LANGUAGES:
-                detected = cls.SUPPORTED_LANGUAGES[lang_prefix]
-                logger.debug(f"Language detected from prefix: {user_lang} -> {detected}")
-                return detected
         
-        logger.debug(f"Language not detected, using default: {cls.DEFAULT_LANGUAGE}")
-        return cls.DEFAULT_LANGUAGE
+        return _language_for_code(user.language_code)
     
     @classmethod
     def detect_from_text(cls, text: str) -> str:
@@ -75,27 +60,31 @@ class LanguageDetector:
         if not text:
             return cls.DEFAULT_LANGUAGE
             
-        text_lower = text.lower()
+        # Distinct indicator words found, collected in a single pass over the text
+        found = {(match.lastgroup, match.group()) for match in _INDICATORS_RE.finditer(text.lower())}
         
-        # Simple heuristics for language detection
-        russian_indicators = ['привет', 'настройки', 'друзья', 'помощь', 'статистика']
-        english_indicators = ['hello', 'settings', 'friends', 'help', 'statistics']
-        spanish_indicators = ['hola', 'configuración', 'amigos', 'ayuda', 'estadísticas']
+        if not found:
+            return cls.DEFAULT_LANGUAGE
         
-        # Count matches
-        ru_score = sum(1 for word in russian_indicators if word in text_lower)
-        en_score = sum(1 for word in english_indicators if word in text_lower)
-        es_score = sum(1 for word in spanish_indicators if word in text_lower)
+        ru_score = en_score = es_score = 0
+        for language, _ in found:
+            if language == 'ru':
+                ru_score += 1
+            elif language == 'en':
+                en_score += 1
+            else:
+                es_score += 1
         
-        # Return language with highest score
-        scores = {'ru': ru_score, 'en': en_score, 'es': es_score}
-        detected = max(scores, key=scores.get)
+        # Return language with highest score; ties go to ru, then en
+        if ru_score >= en_score and ru_score >= es_score:
+            detected, best = 'ru', ru_score
+        elif en_score >= es_score:
+            detected, best = 'en', en_score
+        else:
+            detected, best = 'es', es_score
         
-        if scores[detected] > 0:
-            logger.debug(f"Language detected from text: {detected} (score: {scores[detected]})")
-            return detected
-            
-        return cls.DEFAULT_LANGUAGE
+        logger.debug(f"Language detected from text: {detected} (score: {best})")
+        return detected
     
     @classmethod
     def is_language_supported(cls, language_code: str) -> bool:
@@ -108,7 +97,45 @@ class LanguageDetector:
         Returns:
             True if supported, False otherwise
         """
-        return language_code in ['ru', 'en', 'es']
+        return language_code in _SUPPORTED_CODES
+
+
+# Simple heuristics for language detection from text
+_TEXT_INDICATORS = {
+    'ru': ['привет', 'настройки', 'друзья', 'помощь', 'статистика'],
+    'en': ['hello', 'settings', 'friends', 'help', 'statistics'],
+    'es': ['hola', 'configuración', 'amigos', 'ayuda', 'estadísticas'],
+}
+_INDICATORS_RE = re.compile('|'.join(
+    f"(?P<{language}>{'|'.join(map(re.escape, words))})"
+    for language, words in _TEXT_INDICATORS.items()
+))
+
+# Languages with translations
+_SUPPORTED_CODES = frozenset(('ru', 'en', 'es'))
+
+# Lowercased locale -> language; Telegram does not guarantee the case of language_code
+_NORMALIZED_SUPPORTED = {
+    code.lower(): language for code, language in LanguageDetector.SUPPORTED_LANGUAGES.items()
+}
+
+
+@lru_cache(maxsize=1024)
+def _language_for_code(user_lang: Optional[str]) -> str:
+    """Map a Telegram language_code to a supported language, memoized per code."""
+    if user_lang:
+        # Direct match first, then prefix match (e.g., 'en-NZ' -> 'en')
+        normalized = user_lang.lower()
+        detected = (
+            _NORMALIZED_SUPPORTED.get(normalized)
+            or _NORMALIZED_SUPPORTED.get(normalized.split('-', 1)[0])
+        )
+        if detected:
+            logger.debug(f"Language detected from Telegram: {user_lang} -> {detected}")
+            return detected
+    
+    logger.debug(f"Language not detected, using default: {LanguageDetector.DEFAULT_LANGUAGE}")
+    return LanguageDetector.DEFAULT_LANGUAGE
 
 
 def detect_user_language(user: User, fallback_text: Optional[str] = None) -> str:
@@ -1,43 +1,118 @@
 """
 Main translation engine for Doyobi Diary.
 """
-import json
+import copy
 import os
-from typing import Any, Dict, Optional, Union
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple, Union
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # orjson is optional; stdlib json also accepts UTF-8 bytes
+    from json import loads as _json_loads
 
 from monitoring import get_logger
 
 logger = get_logger(__name__)
 
 
+def _flatten(tree: Dict[str, Any], prefix: str, out: Dict[str, str]) -> Dict[str, str]:
+    """Collect string leaves of a nested catalog under dot-joined keys."""
+    for name, value in tree.items():
+        path = f"{prefix}.{name}" if prefix else name
+        if isinstance(value, dict):
+            _flatten(value, path, out)
+        elif isinstance(value, str):
+            out[path] = value
+    return out
+
+
+_LANGUAGE_INFO = {
+    'ru': {'name': 'Русский', 'native': 'Русский', 'flag': '🇷🇺'},
+    'en': {'name': 'English', 'native': 'English', 'flag': '🇺🇸'},
+    'es': {'name': 'Spanish', 'native': 'Español', 'flag': '🇪🇸'}
+}
+
+
+# Plural form by count for 0..4; larger counts are 'many'
+_PLURAL_FORMS = ('zero', 'one', 'few', 'few', 'few')
+
+
+# Argument types worth memoizing: counts, minutes and limits repeat across
+# users, while strings (names, user text) are mostly unique
+_MEMOIZED_ARG_TYPES = (int, float, bool)
+
+
+@lru_cache(maxsize=1024)
+def _format_cached(template: str, items: Tuple[Tuple[str, type, Any], ...]) -> str:
+    """Format a template with sorted (name, type, value) items; results are memoized."""
+    return template.format(**{name: value for name, _, value in items})
+
+
+def _format_template(template: str, kwargs: Dict[str, Any]) -> str:
+    """Format a template, reusing earlier results for the same numeric arguments."""
+    if '{' not in template and '}' not in template:
+        return template  # Most catalog strings have no fields; skip format entirely
+    if not all(type(value) in _MEMOIZED_ARG_TYPES for value in kwargs.values()):
+        return template.format(**kwargs)
+    # The type is part of the key because 1, 1.0 and True are equal dict keys
+    items = tuple(sorted((name, type(value), value) for name, value in kwargs.items()))
+    return _format_cached(template, items)
+
+
 class Translator:
     """Main translation class with template support and fallbacks."""
     
     def __init__(self, default_language: str = 'ru'):
         self.default_language = default_language
         self.current_language = default_language
-        self._translations: Dict[str, Dict[str, Any]] = {}
-        self._load_all_translations()
+        # Locale file per language; catalogs are parsed on first use
+        self._locale_files: Dict[str, str] = {}
+        # Flat catalogs: language -> {'menu.settings': '...'}
+        self._translations: Dict[str, Dict[str, str]] = {}
+        # Resolved templates by (language, key), shared with per-language copies
+        self._resolved: Dict[Tuple[str, str], str] = {}
+        self._find_locale_files()
+        self._load_language(default_language)
     
-    def _load_all_translations(self) -> None:
-        """Load all translation files."""
+    def _find_locale_files(self) -> None:
+        """Register available translation files without reading them."""
         locales_dir = os.path.join(os.path.dirname(__file__), 'locales')
         
         if not os.path.exists(locales_dir):
             logger.error(f"Locales directory not found: {locales_dir}")
             return
+        
+        with os.scandir(locales_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json'):
+                    lang_code = entry.name[:-5]  # Remove .json extension
+                    self._locale_files[lang_code] = entry.path
+    
+    def _load_language(self, language: str) -> Optional[Dict[str, str]]:
+        """
+        Parse a language's translation file on first use.
+        
+        Args:
+            language: Language code
             
-        for filename in os.listdir(locales_dir):
-            if filename.endswith('.json'):
-                lang_code = filename[:-5]  # Remove .json extension
-                file_path = os.path.join(locales_dir, filename)
-                
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        self._translations[lang_code] = json.load(f)
-                    logger.info(f"Loaded translations for language: {lang_code}")
-                except Exception as e:
-                    logger.error(f"Failed to load translations for {lang_code}: {e}")
+        Returns:
+            Flat catalog, or None if the language has no translation file
+        """
+        file_path = self._locale_files.get(language)
+        if file_path is None:
+            return None
+        
+        try:
+            with open(file_path, 'rb') as f:
+                table = _flatten(_json_loads(f.read()), '', {})
+            logger.info(f"Loaded translations for language: {language}")
+        except Exception as e:
+            logger.error(f"Failed to load translations for {language}: {e}")
+            table = {}  # Do not retry a broken file on every lookup
+        
+        self._translations[language] = table
+        return table
     
     def set_language(self, language_code: str) -> None:
         """
@@ -46,7 +121,7 @@ class Translator:
         Args:
             language_code: Language code (ru/en/es)
         """
-        if language_code in self._translations:
+        if language_code in self._locale_files:
             self.current_language = language_code
             logger.debug(f"Language set to: {language_code}")
         else:
@@ -67,22 +142,15 @@ class Translator:
         """
         target_lang = language or self.current_language
         
-        # Get translation from target language
-        translation = self._get_translation(key, target_lang)
-        
-        # Fallback to default language if not found
-        if translation is None and target_lang != self.default_language:
-            translation = self._get_translation(key, self.default_language)
-        
-        # Ultimate fallback to the key itself
+        translation = self._resolved.get((target_lang, key))
         if translation is None:
-            logger.warning(f"Translation not found for key: {key}")
-            translation = key
+            translation = self._resolve_translation(key, target_lang)
+            self._resolved[(target_lang, key)] = translation
         
         # Apply template variables if provided
         if kwargs and isinstance(translation, str):
             try:
-                translation = translation.format(**kwargs)
+                translation = _format_template(translation, kwargs)
             except KeyError as e:
                 logger.error(f"Template variable missing for key {key}: {e}")
             except Exception as e:
@@ -90,34 +158,50 @@ class Translator:
         
         return translation
     
-    def _get_translation(self, key: str, language: str) -> Optional[str]:
+    def _resolve_translation(self, key: str, language: str) -> str:
         """
-        Get translation for a specific key and language.
+        Resolve the template for a key, applying language fallbacks.
         
         Args:
             key: Translation key (supports dot notation)
             language: Language code
             
         Returns:
-            Translation string or None if not found
+            Translation template, or the key itself if not found
         """
-        if language not in self._translations:
-            return None
+        # Get translation from target language
+        translation = self._get_translation(key, language)
         
-        # Navigate through nested dictionary using dot notation
-        current = self._translations[language]
+        # Fallback to default language if not found
+        if translation is None and language != self.default_language:
+            translation = self._get_translation(key, self.default_language)
         
-        for part in key.split('.'):
-            if isinstance(current, dict) and part in current:
-                current = current[part]
-            else:
-                return None
+        # Ultimate fallback to the key itself
+        if translation is None:
+            logger.warning(f"Translation not found for key: {key}")
+            translation = key
         
-        return current if isinstance(current, str) else None
+        return translation
+    
+    def _get_translation(self, key: str, language: str) -> Optional[str]:
+        """
+        Get translation for a specific key and language.
+        
+        Args:
+            key: Translation key (supports dot notation)
+            language: Language code
+            
+        Returns:
+            Translation string or None if not found
+        """
+        table = self._translations.get(language)
+        if table is None:
+            table = self._load_language(language)
+        return table.get(key) if table is not None else None
     
     def get_available_languages(self) -> list:
         """Get list of available language codes."""
-        return list(self._translations.keys())
+        return list(self._locale_files)
     
     def get_language_info(self, language_code: str) -> Dict[str, str]:
         """
@@ -129,17 +213,11 @@ class Translator:
         Returns:
             Dictionary with language information
         """
-        language_names = {
-            'ru': {'name': 'Русский', 'native': 'Русский', 'flag': '🇷🇺'},
-            'en': {'name': 'English', 'native': 'English', 'flag': '🇺🇸'},
-            'es': {'name': 'Spanish', 'native': 'Español', 'flag': '🇪🇸'}
-        }
-        
-        return language_names.get(language_code, {
+        return _LANGUAGE_INFO.get(language_code) or {
             'name': language_code,
             'native': language_code,
             'flag': '🌐'
-        })
+        }
     
     def pluralize(self, key: str, count: int, language: Optional[str] = None, **kwargs) -> str:
         """
@@ -157,34 +235,28 @@ class Translator:
         kwargs['count'] = count
         target_lang = language or self.current_language
         
-        # Try different pluralization keys
-        if count == 0:
-            plural_key = f"{key}.zero"
-        elif count == 1:
-            plural_key = f"{key}.one"
-        elif count < 5:
-            plural_key = f"{key}.few"
+        # Pick the plural form; negative counts keep the historical 'few'
+        if 0 <= count < len(_PLURAL_FORMS):
+            form = _PLURAL_FORMS[count]
         else:
-            plural_key = f"{key}.many"
+            form = 'many' if count > 0 else 'few'
+        plural_key = f"{key}.{form}"
         
-        # Try to find specific plural form
-        translation = self._get_translation(plural_key, target_lang)
-        
-        # Fallback to base key
-        if translation is None:
-            translation = self._get_translation(key, target_lang)
-        
-        # Apply fallback and formatting
-        if translation is None and target_lang != self.default_language:
-            return self.pluralize(key, count, self.default_language, **kwargs)
-        
-        if translation is None:
+        # Specific plural form, then base key; target language first, then default
+        languages = (target_lang,) if target_lang == self.default_language else (target_lang, self.default_language)
+        for lang in languages:
+            translation = self._get_translation(plural_key, lang)
+            if translation is None:
+                translation = self._get_translation(key, lang)
+            if translation is not None:
+                break
+        else:
             translation = key
         
         # Apply template variables
         if kwargs and isinstance(translation, str):
             try:
-                translation = translation.format(**kwargs)
+                translation = _format_template(translation, kwargs)
             except Exception as e:
                 logger.error(f"Pluralization formatting error for key {key}: {e}")
         
@@ -200,6 +272,25 @@ def get_translator() -> Translator:
     return _global_translator
 
 
+@lru_cache(maxsize=8)
+def get_language_translator(language_code: str) -> Translator:
+    """
+    Get a translator bound to a specific language.
+    
+    Instances are cached per language and share the global translator's
+    loaded dictionaries, so callers never mutate the global instance.
+    
+    Args:
+        language_code: Language code (ru/en/es)
+        
+    Returns:
+        Translator with current_language set
+    """
+    translator = copy.copy(_global_translator)
+    translator.set_language(language_code)
+    return translator
+
+
 def _(key: str, language: Optional[str] = None, **kwargs) -> str:
     """
     Convenience function for translations.
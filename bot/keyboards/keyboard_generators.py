@@ -4,6 +4,7 @@ Keyboard generators for Doyobi Diary.
 This module provides dynamic inline keyboard generation for the Telegram bot interface.
 """
 
+from functools import lru_cache
 from typing import Any, Dict, List
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
@@ -17,6 +18,9 @@ class KeyboardGenerator:
         """
         Generate main menu keyboard.
         
+        There are only two menus per language, so the markup is built once
+        per (is_admin, language) and shared between requests.
+        
         Args:
             is_admin: Whether user is admin (shows admin panel)
             translator: Translator instance for localization
@@ -24,10 +28,12 @@ class KeyboardGenerator:
         Returns:
             InlineKeyboardMarkup for main menu
         """
-        if translator is None:
-            from bot.i18n.translator import Translator
-            translator = Translator()
-            
+        language = translator.current_language if translator is not None else 'ru'
+        return _build_main_menu(bool(is_admin), language)
+    
+    @staticmethod
+    def _main_menu(is_admin: bool, translator) -> InlineKeyboardMarkup:
+        """Build main menu keyboard for a translator."""
         keyboard = [
             [InlineKeyboardButton(translator.translate("menu.questions"), callback_data="menu_questions")],
             [InlineKeyboardButton(translator.translate("menu.friends"), callback_data="menu_friends")],
@@ -48,8 +54,8 @@ class KeyboardGenerator:
     def settings_menu(translator=None) -> InlineKeyboardMarkup:
         """Generate settings menu keyboard."""
         if translator is None:
-            from bot.i18n.translator import Translator
-            translator = Translator()
+            from bot.i18n import get_language_translator
+            translator = get_language_translator('ru')
             
         keyboard = [
             [InlineKeyboardButton(translator.translate("settings.toggle_notifications"), callback_data="settings_toggle_notifications")],
@@ -77,8 +83,8 @@ class KeyboardGenerator:
             InlineKeyboardMarkup for friends menu
         """
         if translator is None:
-            from bot.i18n.translator import Translator
-            translator = Translator()
+            from bot.i18n import get_language_translator
+            translator = get_language_translator('ru')
             
         keyboard = [
             [InlineKeyboardButton(translator.translate("friends.add"), callback_data="friends_add")],
@@ -392,8 +398,8 @@ class KeyboardGenerator:
             InlineKeyboardMarkup for language selection
         """
         if translator is None:
-            from bot.i18n.translator import Translator
-            translator = Translator()
+            from bot.i18n import get_language_translator
+            translator = get_language_translator('ru')
         
         keyboard = [
             [InlineKeyboardButton(
@@ -430,8 +436,8 @@ class KeyboardGenerator:
             InlineKeyboardMarkup for questions menu
         """
         if translator is None:
-            from bot.i18n.translator import Translator
-            translator = Translator()
+            from bot.i18n import get_language_translator
+            translator = get_language_translator('ru')
         
         keyboard = []
         
@@ -503,8 +509,8 @@ class KeyboardGenerator:
             InlineKeyboardMarkup for question editing
         """
         if translator is None:
-            from bot.i18n.translator import Translator
-            translator = Translator()
+            from bot.i18n import get_language_translator
+            translator = get_language_translator('ru')
         
         keyboard = []
         
@@ -544,8 +550,8 @@ class KeyboardGenerator:
             InlineKeyboardMarkup for templates
         """
         if translator is None:
-            from bot.i18n.translator import Translator
-            translator = Translator()
+            from bot.i18n import get_language_translator
+            translator = get_language_translator('ru')
         
         keyboard = []
         
@@ -610,8 +616,8 @@ class KeyboardGenerator:
             InlineKeyboardMarkup for deletion confirmation
         """
         if translator is None:
-            from bot.i18n.translator import Translator
-            translator = Translator()
+            from bot.i18n import get_language_translator
+            translator = get_language_translator('ru')
         
         keyboard = [
             [
@@ -629,6 +635,13 @@ class KeyboardGenerator:
         return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=16)
+def _build_main_menu(is_admin: bool, language: str) -> InlineKeyboardMarkup:
+    """Build and memoize main menu markup for (is_admin, language)."""
+    from bot.i18n import get_language_translator
+    return KeyboardGenerator._main_menu(is_admin, get_language_translator(language))
+
+
 # Convenience functions for common keyboards
 
 def get_main_menu_keyboard(is_admin: bool = False, translator=None) -> InlineKeyboardMarkup:
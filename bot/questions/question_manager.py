@@ -108,6 +108,86 @@ class QuestionManager:
             logger.error(f"Error ensuring default question for user {user_id}: {e}")
             return False
     
+    @track_errors_async("get_default_question_id")
+    async def get_default_question_id(self, user_id: int) -> Optional[int]:
+        """
+        Get the ID of the user's default question, creating it if missing.
+        
+        The ID is cached, so warm users skip the database entirely.
+        
+        Args:
+            user_id: Telegram user ID
+            
+        Returns:
+            Default question ID or None
+        """
+        cache_key = f"default_question_id_{user_id}"
+        
+        if self.cache:
+            question_id = await self.cache.get(cache_key)
+            if question_id is not None:
+                return question_id
+        
+        default_question = await self.question_ops.get_active_default_question(user_id)
+        if not default_question:
+            await self.ensure_user_has_default_question(user_id)
+            default_question = await self.question_ops.get_active_default_question(user_id)
+        
+        if not default_question:
+            return None
+        
+        if self.cache:
+            await self.cache.set(cache_key, default_question['id'], 3600)
+        
+        return default_question['id']
+    
+    @track_errors_async("upsert_default_question_schedule")
+    async def upsert_default_question_schedule(
+        self,
+        user_id: int,
+        window_start: Optional[str] = None,
+        window_end: Optional[str] = None,
+        interval_minutes: Optional[int] = None
+    ) -> bool:
+        """
+        Ensure user has a default question and update its schedule.
+        
+        Uses a single server-side function; falls back to separate queries
+        if the function is not deployed.
+        
+        Args:
+            user_id: Telegram user ID
+            window_start: New window start (HH:MM:SS) or None to keep current
+            window_end: New window end (HH:MM:SS) or None to keep current
+            interval_minutes: New interval or None to keep current
+            
+        Returns:
+            True if successful
+        """
+        question = await self.question_ops.ensure_and_update_default_question(
+            user_id, window_start, window_end, interval_minutes
+        )
+        
+        if question:
+            if self.cache:
+                await self.cache.set(f"default_question_id_{user_id}", question['id'], 3600)
+            return True
+        
+        # Fallback: resolve default question ID, then update
+        question_id = await self.get_default_question_id(user_id)
+        if not question_id:
+            return False
+        
+        updates = {
+            field: value for field, value in (
+                ('window_start', window_start),
+                ('window_end', window_end),
+                ('interval_minutes', interval_minutes)
+            ) if value is not None
+        }
+        
+        return await self.question_ops.update_question(question_id, updates)
+    
     @track_errors_async("determine_question_for_message")
     async def determine_question_for_message(
         self, 
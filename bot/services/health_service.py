@@ -20,6 +20,9 @@ from monitoring import get_logger
 
 logger = get_logger(__name__)
 
+# Сколько секунд переиспользовать последний результат проверки здоровья
+HEALTH_CACHE_TTL_SECONDS = 10.0
+
 
 @dataclass
 class HealthStatus:
@@ -64,6 +67,10 @@ class HealthService:
         self.version = version
         self.start_time = time.time()
         
+        self._cached_health: Optional[SystemHealth] = None
+        self._cached_at = 0.0
+        self._health_task: Optional[asyncio.Task] = None
+        
         logger.info("HealthService инициализирован")
     
     async def check_database(self) -> HealthStatus:
@@ -232,6 +239,30 @@ class HealthService:
         logger.info(f"System health check completed: {overall_status}")
         return system_health
     
+    async def get_cached_system_health(
+        self, application=None, max_age_seconds: float = HEALTH_CACHE_TTL_SECONDS
+    ) -> SystemHealth:
+        """
+        Получить статус здоровья, переиспользуя недавний результат.
+        
+        Одновременные вызовы ожидают одну и ту же проверку.
+        """
+        if self._cached_health is not None and time.monotonic() - self._cached_at < max_age_seconds:
+            return self._cached_health
+        
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._refresh_system_health(application))
+        
+        # shield: отмена одного вызывающего не прерывает общую проверку
+        return await asyncio.shield(self._health_task)
+    
+    async def _refresh_system_health(self, application=None) -> SystemHealth:
+        """Выполнить проверку здоровья и сохранить результат."""
+        health = await self.get_system_health(application)
+        self._cached_health = health
+        self._cached_at = time.monotonic()
+        return health
+    
     def _determine_overall_status(self, components: Dict[str, HealthStatus]) -> str:
         """Определить общий статус на основе компонентов."""
         if not components:
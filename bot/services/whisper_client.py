@@ -8,10 +8,10 @@ WhisperClient - Интеграция с OpenAI Whisper API для расшифр
 - Логирование операций
 """
 
+import asyncio
+import hashlib
 import os
-import tempfile
 from typing import Optional, Dict, Any
-import aiofiles
 import aiohttp
 from openai import AsyncOpenAI
 from openai.types.audio import Transcription
@@ -51,7 +51,8 @@ class WhisperClient:
         model: str = "whisper-1",
         max_file_size_mb: int = 25,
         max_duration_seconds: int = 120,
-        cache_ttl_seconds: int = 3600
+        cache_ttl_seconds: int = 3600,
+        max_concurrent_requests: int = 8
     ):
         """
         Initialize WhisperClient.
@@ -62,6 +63,7 @@ class WhisperClient:
             max_file_size_mb: Maximum file size in MB (default: 25)
             max_duration_seconds: Maximum audio duration in seconds (default: 120)
             cache_ttl_seconds: Cache TTL for transcription results (default: 3600)
+            max_concurrent_requests: Whisper API calls allowed in flight at once (default: 8)
         """
         self.client = AsyncOpenAI(api_key=api_key)
         self.model = model
@@ -71,19 +73,26 @@ class WhisperClient:
         # Cache for transcription results (to avoid re-transcribing same audio)
         self.cache = TTLCache(ttl_seconds=cache_ttl_seconds)
         
+        # Concurrent voice messages share the client's connection pool; the cap
+        # keeps bursts from exceeding it and tripping OpenAI rate limits
+        self._request_semaphore = asyncio.Semaphore(max_concurrent_requests)
+        
         logger.info(
             f"WhisperClient initialized with model={model}, "
             f"max_file_size={max_file_size_mb}MB, "
             f"max_duration={max_duration_seconds}s"
         )
     
+    async def close(self) -> None:
+        """Close the underlying OpenAI HTTP client and its connection pool."""
+        await self.client.close()
+    
     def _get_cache_key(self, file_hash: str) -> str:
         """Generate cache key for audio file."""
         return f"whisper_transcription_{file_hash}"
     
     def _calculate_file_hash(self, file_path: str) -> str:
         """Calculate simple hash for audio file (using file size and name)."""
-        import hashlib
         stat = os.stat(file_path)
         # Simple hash based on file size and modification time
         hash_input = f"{stat.st_size}_{stat.st_mtime}_{os.path.basename(file_path)}"
@@ -101,8 +110,20 @@ class WhisperClient:
             AudioTooLargeError: If file is too large
             AudioTooLongError: If audio is too long
         """
-        # Check file size
-        file_size = os.path.getsize(file_path)
+        self._validate_audio_size(os.path.getsize(file_path), duration_seconds)
+    
+    def _validate_audio_size(self, file_size: int, duration_seconds: Optional[int] = None) -> None:
+        """
+        Validate audio size and duration constraints.
+        
+        Args:
+            file_size: Audio size in bytes
+            duration_seconds: Audio duration in seconds (if known)
+            
+        Raises:
+            AudioTooLargeError: If file is too large
+            AudioTooLongError: If audio is too long
+        """
         if file_size > self.max_file_size_bytes:
             raise AudioTooLargeError(
                 f"Audio file size {file_size / (1024*1024):.1f}MB exceeds limit "
@@ -115,7 +136,7 @@ class WhisperClient:
                 f"Audio duration {duration_seconds}s exceeds limit {self.max_duration_seconds}s"
             )
         
-        logger.debug(f"Audio file validation passed: {file_size} bytes, {duration_seconds}s")
+        logger.debug("Audio file validation passed", size=file_size, duration=duration_seconds)
     
     async def transcribe_audio(
         self,
@@ -151,57 +172,21 @@ class WhisperClient:
                 cache_key = self._get_cache_key(file_hash)
                 cached_result = await self.cache.get(cache_key)
                 if cached_result:
-                    logger.info(f"Using cached transcription for {file_path}")
+                    logger.info("Using cached transcription", file=file_path)
                     return cached_result
             
             # Transcribe using OpenAI Whisper
-            logger.info(f"Starting transcription for {file_path} (language: {language})")
-            
-            try:
-                # OpenAI client requires regular file objects, not async
-                with open(file_path, 'rb') as audio_file:
-                    transcription_params = {
-                        "model": self.model,
-                        "file": audio_file,
-                        "response_format": "text"
-                    }
-                    
-                    if language:
-                        transcription_params["language"] = language
-                    
-                    logger.info(f"Calling OpenAI Whisper API with model={self.model}, language={language}")
-                    transcription: Transcription = await self.client.audio.transcriptions.create(
-                        **transcription_params
-                    )
-                    logger.info(f"OpenAI API call successful")
-                    
-                # Extract text from response
-                if hasattr(transcription, 'text'):
-                    text = transcription.text.strip()
-                else:
-                    # Handle different response formats
-                    text = str(transcription).strip()
-                
-                logger.info(f"Raw transcription response: '{text}', type: {type(transcription)}")
-                
-                if not text:
-                    logger.warning(f"Empty transcription for {file_path}, file size: {os.path.getsize(file_path)} bytes")
-                    raise TranscriptionError("Empty transcription result")
-                
-                # Cache successful result
-                if use_cache:
-                    await self.cache.set(cache_key, text)
-                
-                logger.info(
-                    f"Transcription completed successfully: {len(text)} characters, "
-                    f"language: {language or 'auto'}"
-                )
-                
-                return text
-                
-            except Exception as api_error:
-                logger.error(f"OpenAI API call failed: {type(api_error).__name__}: {api_error}")
-                raise
+            logger.info("Starting transcription", file=file_path, language=language)
+            
+            # OpenAI client requires regular file objects, not async
+            with open(file_path, 'rb') as audio_file:
+                text = await self._request_transcription(audio_file, language)
+            
+            # Cache successful result
+            if use_cache:
+                await self.cache.set(cache_key, text)
+            
+            return text
                 
         except (AudioTooLargeError, AudioTooLongError):
             # Re-raise validation errors as-is
@@ -210,6 +195,112 @@ class WhisperClient:
             logger.error(f"Transcription failed for {file_path}: {e}")
             raise TranscriptionError(f"Failed to transcribe audio: {e}") from e
     
+    async def transcribe_audio_bytes(
+        self,
+        data: bytes,
+        filename: str,
+        language: Optional[str] = None,
+        duration_seconds: Optional[int] = None,
+        use_cache: bool = True
+    ) -> str:
+        """
+        Transcribe in-memory audio using Whisper API.
+        
+        Args:
+            data: Audio file content
+            filename: File name sent with the upload; its extension tells Whisper the format
+            language: Language code (e.g., 'ru', 'en'). If None, auto-detect
+            duration_seconds: Audio duration in seconds (for validation)
+            use_cache: Whether to use cache for results
+            
+        Returns:
+            Transcribed text
+            
+        Raises:
+            AudioTooLargeError: If audio is too large
+            AudioTooLongError: If audio is too long
+            TranscriptionError: If transcription fails
+        """
+        try:
+            self._validate_audio_size(len(data), duration_seconds)
+            
+            # Check cache first
+            if use_cache:
+                cache_key = self._get_cache_key(hashlib.sha256(data).hexdigest())
+                cached_result = await self.cache.get(cache_key)
+                if cached_result:
+                    logger.info("Using cached transcription", file=filename)
+                    return cached_result
+            
+            logger.info("Starting transcription", file=filename, size=len(data), language=language)
+            text = await self._request_transcription((filename, data), language)
+            
+            # Cache successful result
+            if use_cache:
+                await self.cache.set(cache_key, text)
+            
+            return text
+            
+        except (AudioTooLargeError, AudioTooLongError):
+            # Re-raise validation errors as-is
+            raise
+        except Exception as e:
+            logger.error(f"Transcription failed for {filename}: {e}")
+            raise TranscriptionError(f"Failed to transcribe audio: {e}") from e
+    
+    async def _request_transcription(self, audio_file, language: Optional[str]) -> str:
+        """
+        Send audio to the Whisper API and return the stripped text.
+        
+        Args:
+            audio_file: Open binary file or (filename, bytes) tuple
+            language: Language code, or None to auto-detect
+            
+        Raises:
+            TranscriptionError: If the result is empty
+        """
+        try:
+            transcription_params = {
+                "model": self.model,
+                "file": audio_file,
+                "response_format": "text"
+            }
+            
+            if language:
+                transcription_params["language"] = language
+            
+            async with self._request_semaphore:
+                logger.info("Calling OpenAI Whisper API", model=self.model, language=language)
+                transcription: Transcription = await self.client.audio.transcriptions.create(
+                    **transcription_params
+                )
+            logger.info("OpenAI API call successful")
+            
+            # Extract text from response
+            if hasattr(transcription, 'text'):
+                text = transcription.text.strip()
+            else:
+                # Handle different response formats
+                text = str(transcription).strip()
+            
+            logger.debug("Raw transcription response", length=len(text), response_type=type(transcription).__name__)
+            
+            if not text:
+                logger.warning("Empty transcription result")
+                raise TranscriptionError("Empty transcription result")
+            
+            logger.info(
+                "Transcription completed successfully",
+                characters=len(text),
+                language=language or 'auto'
+            )
+            
+            return text
+            
+        except Exception as api_error:
+            logger.error(f"OpenAI API call failed: {type(api_error).__name__}: {api_error}")
+            raise
+    
     async def get_supported_formats(self) -> list[str]:
         """
         Get list of supported audio formats.
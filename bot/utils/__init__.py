@@ -13,12 +13,15 @@ from .exceptions import (
     UserNotFound,
     ValidationError,
 )
+from .markdown_utils import escape_markdown
 from .rate_limiter import (
     check_admin_rate_limit,
     check_command_rate_limit,
     check_discovery_rate_limit,
     check_friend_request_rate_limit,
     cleanup_rate_limiter_task,
+    concurrent_limit,
+    instrumented_handler,
     rate_limit,
     rate_limiter,
 )
@@ -26,9 +29,12 @@ from .rate_limiter import (
 __all__ = [
     "safe_parse_datetime",
     "validate_time_window", 
+    "escape_markdown",
     "CacheManager",
     "rate_limiter",
     "rate_limit",
+    "concurrent_limit",
+    "instrumented_handler",
     "check_command_rate_limit",
     "check_friend_request_rate_limit", 
     "check_discovery_rate_limit",
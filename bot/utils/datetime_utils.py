@@ -9,6 +9,8 @@ from monitoring import get_logger, track_errors
 
 logger = get_logger(__name__)
 
+_TIME_WINDOW_RE = re.compile(r'^([0-2][0-9]):([0-5][0-9])-([0-2][0-9]):([0-5][0-9])$')
+
 
 @track_errors("datetime_parsing")
 def safe_parse_datetime(dt_string: str) -> Optional[datetime]:
@@ -25,8 +27,7 @@ def safe_parse_datetime(dt_string: str) -> Optional[datetime]:
 @track_errors("time_validation")
 def validate_time_window(time_range: str) -> Tuple[bool, str, Optional[time], Optional[time]]:
     """Улучшенная валидация временного окна."""
-    pattern = r'^([0-2][0-9]):([0-5][0-9])-([0-2][0-9]):([0-5][0-9])$'
-    match = re.match(pattern, time_range)
+    match = _TIME_WINDOW_RE.match(time_range)
     
     if not match:
         return False, "Неправильный формат! Используйте HH:MM-HH:MM", None, None
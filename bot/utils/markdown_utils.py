@@ -0,0 +1,19 @@
+"""
+Markdown formatting helpers.
+"""
+
+# Characters that break Telegram legacy Markdown when left unescaped
+_MD_ESCAPE = str.maketrans({
+    '_': '\\_',
+    '*': '\\*',
+    '`': '\\`',
+    '[': '\\[',
+    ']': '\\]',
+})
+
+
+def escape_markdown(text) -> str:
+    """Escape special characters for Telegram Markdown."""
+    if not text:
+        return ""
+    return str(text).translate(_MD_ESCAPE)
@@ -2,11 +2,15 @@
 Rate limiting utilities to prevent spam and abuse.
 """
 import asyncio
+import math
+import time
 from collections import defaultdict, deque
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple
 
-from monitoring import get_logger, track_errors
+import sentry_sdk
+
+from monitoring import get_logger, report_async_failure, set_operation_scope, track_errors
 
 logger = get_logger(__name__)
 
@@ -103,6 +107,107 @@ class RateLimiter:
         return cleaned
 
 
+class TokenBucket:
+    """Token bucket with lazy refill for O(1) admission checks."""
+    
+    def __init__(self, capacity: int, refill_rate: float):
+        """
+        Initialize token bucket.
+        
+        Args:
+            capacity: Maximum number of tokens (burst size)
+            refill_rate: Tokens added per second
+        """
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+    
+    def _refill(self) -> None:
+        """Add tokens accumulated since the last refill, capped at capacity."""
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+            self.last_refill = now
+    
+    def try_consume(self, tokens: int = 1) -> bool:
+        """
+        Consume tokens if available.
+        
+        Synchronous on purpose: there is no await between the refill and the
+        decrement, so the check is atomic on the event loop.
+        
+        Args:
+            tokens: Number of tokens to consume
+            
+        Returns:
+            True if tokens were consumed, False if the bucket is exhausted
+        """
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+    
+    def time_until_available(self, tokens: int = 1) -> float:
+        """Seconds until the requested number of tokens is available."""
+        self._refill()
+        missing = tokens - self.tokens
+        if missing <= 0 or self.refill_rate <= 0:
+            return 0.0
+        return missing / self.refill_rate
+    
+    def retry_after(self, tokens: int = 1) -> int:
+        """Seconds until the requested number of tokens is available (at least 1)."""
+        return max(1, math.ceil(self.time_until_available(tokens)))
+    
+    def is_full(self) -> bool:
+        """Check if the bucket has refilled to capacity."""
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class NestedTokenBucket(TokenBucket):
+    """Token bucket that also draws from a parent bucket (e.g. per-chat -> global)."""
+    
+    def __init__(self, capacity: int, refill_rate: float, parent: Optional["NestedTokenBucket"] = None):
+        """
+        Initialize nested token bucket.
+        
+        Args:
+            capacity: Maximum number of tokens (burst size)
+            refill_rate: Tokens added per second
+            parent: Optional parent bucket that must also admit the request
+        """
+        super().__init__(capacity, refill_rate)
+        self.parent = parent
+    
+    def try_consume(self, tokens: int = 1) -> bool:
+        """Consume tokens from this bucket and every ancestor, or from none of them."""
+        self._refill()
+        if self.tokens < tokens:
+            return False
+        
+        if self.parent is not None and not self.parent.try_consume(tokens):
+            return False
+        
+        self.tokens -= tokens
+        return True
+    
+    def time_until_available(self, tokens: int = 1) -> float:
+        """Seconds until this bucket and all ancestors can admit the request."""
+        wait = super().time_until_available(tokens)
+        if self.parent is not None:
+            wait = max(wait, self.parent.time_until_available(tokens))
+        return wait
+    
+    async def acquire(self, tokens: int = 1) -> None:
+        """Wait until tokens can be consumed from the whole bucket chain."""
+        while not self.try_consume(tokens):
+            await asyncio.sleep(max(self.time_until_available(tokens), 0.01))
+
+
 class MultiTierRateLimiter:
     """Multi-tier rate limiter with different limits for different actions."""
     
@@ -133,6 +238,53 @@ class MultiTierRateLimiter:
             # Voice messages - 10 per hour (API costs money)
             "voice_message": RateLimiter(max_requests=10, window_seconds=3600),
         }
+        
+        # Token buckets mirroring the sliding-window limits, used as a cheap gate
+        self.buckets: Dict[str, TokenBucket] = {}
+    
+    def set_limit(self, action: str, max_requests: int, window_seconds: int) -> None:
+        """
+        Replace the limit for an action on a running limiter.
+        
+        Token buckets built from the old limit are dropped so the
+        fast gate picks up the new capacity.
+        """
+        self.limiters[action] = RateLimiter(max_requests=max_requests, window_seconds=window_seconds)
+        
+        suffix = f":{action}"
+        stale_keys = [key for key in self.buckets if key.endswith(suffix)]
+        for key in stale_keys:
+            del self.buckets[key]
+    
+    def try_consume(self, user_id: int, action: str) -> Tuple[bool, Optional[int]]:
+        """
+        Fast synchronous token-bucket check for a specific action.
+        
+        Over-limit users are rejected here in O(1) without taking the
+        sliding-window lock.
+        
+        Args:
+            user_id: User identifier
+            action: Action type (general, friend_request, settings, etc.)
+            
+        Returns:
+            Tuple of (is_allowed, retry_after_seconds)
+        """
+        key = f"{user_id}:{action}"
+        bucket = self.buckets.get(key)
+        
+        if bucket is None:
+            limiter = self.limiters.get(action, self.limiters["general"])
+            bucket = TokenBucket(
+                capacity=limiter.max_requests,
+                refill_rate=limiter.max_requests / limiter.window_seconds
+            )
+            self.buckets[key] = bucket
+        
+        if bucket.try_consume():
+            return True, None
+        
+        return False, bucket.retry_after()
     
     async def check_limit(self, user_id: int, action: str) -> Tuple[bool, Optional[int]]:
         """
@@ -164,12 +316,92 @@ class MultiTierRateLimiter:
             cleaned = limiter.cleanup_old_entries()
             total_cleaned += cleaned
         
+        # Full buckets carry no state worth keeping
+        full_keys = [key for key, bucket in self.buckets.items() if bucket.is_full()]
+        for key in full_keys:
+            del self.buckets[key]
+        
         return total_cleaned
 
 
 # Global rate limiter instance
 rate_limiter = MultiTierRateLimiter()
 
+# Telegram outbound limits: ~30 messages/sec per bot, ~1 message/sec per chat
+telegram_global_bucket = NestedTokenBucket(capacity=30, refill_rate=30)
+_telegram_chat_buckets: Dict[int, NestedTokenBucket] = {}
+
+
+def get_telegram_chat_bucket(chat_id: int) -> NestedTokenBucket:
+    """Get (lazily create) the outbound bucket for a chat, nested under the global one."""
+    bucket = _telegram_chat_buckets.get(chat_id)
+    if bucket is None:
+        bucket = NestedTokenBucket(capacity=1, refill_rate=1, parent=telegram_global_bucket)
+        _telegram_chat_buckets[chat_id] = bucket
+    return bucket
+
+
+async def acquire_telegram_send_slot(chat_id: int) -> None:
+    """Wait for both the per-chat and global Telegram send budgets."""
+    await get_telegram_chat_bucket(chat_id).acquire()
+
+
+# Bound on in-flight outbound Telegram calls, so bursts can't starve the HTTP pool
+TELEGRAM_MAX_CONCURRENT_SENDS = 32
+telegram_send_semaphore = asyncio.Semaphore(TELEGRAM_MAX_CONCURRENT_SENDS)
+
+# In-flight handler calls per (user_id, action), for concurrent_limit
+_in_flight: Dict[Tuple[int, str], int] = defaultdict(int)
+
+
+def cleanup_telegram_buckets() -> int:
+    """Drop per-chat buckets that have fully refilled."""
+    full_chats = [chat_id for chat_id, bucket in _telegram_chat_buckets.items() if bucket.is_full()]
+    for chat_id in full_chats:
+        del _telegram_chat_buckets[chat_id]
+    return len(full_chats)
+
+
+def _extract_user_id(args, kwargs) -> Optional[int]:
+    """Find the user ID in a handler's arguments."""
+    user_id = None
+    
+    # Look for user_id in common argument patterns
+    if args:
+        # Check if first arg is Update object
+        if hasattr(args[0], 'effective_user') and args[0].effective_user:
+            user_id = args[0].effective_user.id
+        elif isinstance(args[0], int):
+            user_id = args[0]
+    
+    # Look in kwargs
+    if user_id is None:
+        user_id = kwargs.get('user_id') or kwargs.get('tg_id')
+    
+    return user_id
+
+
+async def _enforce_rate_limit(user_id: int, action: str, error_message: Optional[str], function_name: str) -> None:
+    """Consume a rate-limit token for the user or raise RateLimitExceeded."""
+    # Token-bucket short-circuit before any other work is scheduled
+    is_allowed, retry_after = rate_limiter.try_consume(user_id, action)
+    
+    # Sliding window keeps precise usage stats for allowed requests
+    if is_allowed:
+        is_allowed, retry_after = await rate_limiter.check_limit(user_id, action)
+    
+    if not is_allowed:
+        logger.warning("Rate limit exceeded", 
+                     user_id=user_id, action=action, retry_after=retry_after, function=function_name)
+        
+        # Raise custom exception or return error
+        from bot.utils.exceptions import RateLimitExceeded
+        raise RateLimitExceeded(
+            message=error_message or f"Too many {action} requests. Try again in {retry_after} seconds.",
+            retry_after=retry_after,
+            action=action
+        )
+
 
 def rate_limit(action: str = "general", error_message: str = None):
     """
@@ -181,42 +413,90 @@ def rate_limit(action: str = "general", error_message: str = None):
     """
     def decorator(func):
         async def wrapper(*args, **kwargs):
-            # Try to extract user_id from args
-            user_id = None
-            
-            # Look for user_id in common argument patterns
-            if args:
-                # Check if first arg is Update object
-                if hasattr(args[0], 'effective_user') and args[0].effective_user:
-                    user_id = args[0].effective_user.id
-                elif isinstance(args[0], int):
-                    user_id = args[0]
+            user_id = _extract_user_id(args, kwargs)
             
-            # Look in kwargs
             if user_id is None:
-                user_id = kwargs.get('user_id') or kwargs.get('tg_id')
+                logger.warning("Rate limiting skipped - no user_id found", function=func.__name__)
+                return await func(*args, **kwargs)
+            
+            await _enforce_rate_limit(user_id, action, error_message, func.__name__)
+            
+            # Execute function if allowed
+            return await func(*args, **kwargs)
+        
+        return wrapper
+    return decorator
+
+
+def instrumented_handler(operation_name: str, action: str = "general", error_message: str = None):
+    """
+    Decorator combining rate_limit and track_errors_async in one wrapper.
+    
+    Equivalent to stacking @rate_limit(action) over @track_errors_async(operation_name),
+    without the extra wrapper frame on every handler call.
+    
+    Args:
+        operation_name: Operation name reported to error tracking
+        action: Action type for rate limiting
+        error_message: Custom error message when rate limited
+    """
+    def decorator(func):
+        async def wrapper(*args, **kwargs):
+            user_id = _extract_user_id(args, kwargs)
             
             if user_id is None:
                 logger.warning("Rate limiting skipped - no user_id found", function=func.__name__)
-                return await func(*args, **kwargs)
+            else:
+                await _enforce_rate_limit(user_id, action, error_message, func.__name__)
             
-            # Check rate limit
-            is_allowed, retry_after = await rate_limiter.check_limit(user_id, action)
+            with sentry_sdk.configure_scope() as scope:
+                set_operation_scope(scope, operation_name, func, args, kwargs)
+                
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    report_async_failure(func, operation_name, e, args, kwargs)
+                    raise
+        
+        return wrapper
+    return decorator
+
+
+def concurrent_limit(action: str = "general", max_concurrent: int = 2, error_message: str = None):
+    """
+    Decorator capping how many calls of an action a user can have in flight.
+    
+    Args:
+        action: Action type for the concurrency cap
+        max_concurrent: Maximum simultaneous calls per user
+        error_message: Custom error message when the cap is hit
+    """
+    def decorator(func):
+        async def wrapper(*args, **kwargs):
+            user_id = _extract_user_id(args, kwargs)
             
-            if not is_allowed:
-                logger.warning("Rate limit exceeded", 
-                             user_id=user_id, action=action, retry_after=retry_after, function=func.__name__)
+            if user_id is None:
+                return await func(*args, **kwargs)
+            
+            key = (user_id, action)
+            if _in_flight[key] >= max_concurrent:
+                logger.warning("Concurrent limit exceeded",
+                             user_id=user_id, action=action, function=func.__name__)
                 
-                # Raise custom exception or return error
                 from bot.utils.exceptions import RateLimitExceeded
                 raise RateLimitExceeded(
-                    message=error_message or f"Too many {action} requests. Try again in {retry_after} seconds.",
-                    retry_after=retry_after,
+                    message=error_message or f"Too many simultaneous {action} requests. Try again in a moment.",
+                    retry_after=1,
                     action=action
                 )
             
-            # Execute function if allowed
-            return await func(*args, **kwargs)
+            _in_flight[key] += 1
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _in_flight[key] -= 1
+                if _in_flight[key] <= 0:
+                    del _in_flight[key]
         
         return wrapper
     return decorator
@@ -255,6 +535,7 @@ async def cleanup_rate_limiter_task():
         try:
             await asyncio.sleep(300)  # Clean up every 5 minutes
             cleaned = rate_limiter.cleanup_all()
+            cleanup_telegram_buckets()
             if cleaned > 0:
                 logger.debug("Rate limiter background cleanup", cleaned_entries=cleaned)
         except Exception as exc:
@@ -20,10 +20,10 @@ from bot.handlers.admin_handlers import setup_admin_handlers
 from bot.handlers.callback_handlers import setup_callback_handlers
 from bot.handlers.command_handlers import setup_command_handlers
 from bot.handlers.error_handler import setup_error_handler
-from bot.handlers.message_handlers import setup_message_handlers
+from bot.handlers.message_handlers import drain_pending_replies, setup_message_handlers
 from bot.handlers.voice_handlers import setup_voice_handlers
 from bot.services.multi_question_scheduler import create_multi_question_scheduler
-from bot.utils.rate_limiter import MultiTierRateLimiter
+from bot.utils.rate_limiter import rate_limiter
 
 # Monitoring setup
 try:
@@ -58,7 +58,8 @@ async def create_application() -> Application:
     else:
         logger.info("✅ Database connection established")
     
-    rate_limiter = MultiTierRateLimiter()
+    # Handlers share the global limiter that the rate_limit decorators enforce
+    rate_limiter.set_limit("feedback", config.feedback_rate_limit, window_seconds=3600)
     user_cache = TTLCache(ttl_seconds=config.cache_ttl_seconds)
     
     logger.info("Core components initialized")
@@ -104,6 +105,17 @@ async def main() -> None:
         logger.info("Bot is ready! Starting polling...")
         await application.run_polling()
     finally:
+        # Write out activities still waiting in the current batch
+        if 'activity_batcher' in application.bot_data:
+            await application.bot_data['activity_batcher'].flush()
+        
+        # Deliver replies that handlers handed off to background tasks
+        await drain_pending_replies()
+        
+        # Release the Whisper client's connection pool
+        if 'whisper_client' in application.bot_data:
+            await application.bot_data['whisper_client'].close()
+        
         # Cleanup scheduler on shutdown
         if 'multi_question_scheduler' in application.bot_data:
             scheduler = application.bot_data['multi_question_scheduler']
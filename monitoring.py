@@ -4,6 +4,7 @@ Monitoring and logging configuration for Doyobi Diary.
 import logging
 import os
 import time
+from contextvars import ContextVar
 
 import sentry_sdk
 import structlog
@@ -86,7 +87,7 @@ def before_send_filter(event, hint):
             ]):
                 return None
     
-    return event
+    return _attach_user_context(event)
 
 
 def before_send_transaction_filter(event, hint):
@@ -100,7 +101,7 @@ def before_send_transaction_filter(event, hint):
     if event.get('timestamp', 0) - event.get('start_timestamp', 0) < 0.1:
         return None
     
-    return event
+    return _attach_user_context(event)
 
 
 def configure_structlog():
@@ -188,6 +189,32 @@ def track_errors(operation_name: str = None):
     return decorator
 
 
+def set_operation_scope(scope, op_name: str, func, args, kwargs) -> None:
+    """Tag a Sentry scope with the operation and function being executed."""
+    scope.set_tag("operation", op_name)
+    scope.set_context("function", {
+        "name": func.__name__,
+        "module": func.__module__,
+        "args_count": len(args),
+        "kwargs_keys": list(kwargs.keys())
+    })
+
+
+def report_async_failure(func, op_name: str, error: Exception, args, kwargs) -> None:
+    """Log a failed async call and attach its arguments to the Sentry event."""
+    logger = get_logger(func.__module__)
+    logger.error(
+        "Async function execution failed",
+        function=func.__name__,
+        error=str(error),
+        operation=op_name
+    )
+    
+    # Add extra context to Sentry
+    sentry_sdk.set_extra("function_args", str(args)[:500])
+    sentry_sdk.set_extra("function_kwargs", str(kwargs)[:500])
+
+
 def track_errors_async(operation_name: str = None):
     """Async version of error tracking decorator."""
     def decorator(func):
@@ -195,30 +222,12 @@ def track_errors_async(operation_name: str = None):
             op_name = operation_name or f"{func.__module__}.{func.__name__}"
             
             with sentry_sdk.configure_scope() as scope:
-                scope.set_tag("operation", op_name)
-                scope.set_context("function", {
-                    "name": func.__name__,
-                    "module": func.__module__,
-                    "args_count": len(args),
-                    "kwargs_keys": list(kwargs.keys())
-                })
+                set_operation_scope(scope, op_name, func, args, kwargs)
                 
                 try:
                     return await func(*args, **kwargs)
                 except Exception as e:
-                    # Log structured error
-                    logger = get_logger(func.__module__)
-                    logger.error(
-                        "Async function execution failed",
-                        function=func.__name__,
-                        error=str(e),
-                        operation=op_name
-                    )
-                    
-                    # Add extra context to Sentry
-                    sentry_sdk.set_extra("function_args", str(args)[:500])
-                    sentry_sdk.set_extra("function_kwargs", str(kwargs)[:500])
-                    
+                    report_async_failure(func, op_name, e, args, kwargs)
                     raise
         
         return wrapper
@@ -254,13 +263,32 @@ def track_performance(operation_name: str = None):
 
 
 # Bot-specific monitoring functions
+# User of the update handled in the current task; read by the before_send filters
+_current_user_context: ContextVar = ContextVar("current_user_context", default=None)
+
+
 def set_user_context(user_id: int, username: str = None, first_name: str = None):
-    """Set user context for better error tracking."""
-    sentry_sdk.set_user({
-        "id": str(user_id),
-        "username": username,
-        "name": first_name
-    })
+    """
+    Set user context for better error tracking.
+    
+    Only records the user for the current task; the Sentry user is built
+    in the before_send filters, so messages that raise nothing never touch
+    the SDK scope.
+    """
+    _current_user_context.set((user_id, username, first_name))
+
+
+def _attach_user_context(event):
+    """Fill the event's user from the current context unless Sentry already has one."""
+    user_context = _current_user_context.get()
+    if user_context is not None and not event.get('user'):
+        user_id, username, first_name = user_context
+        event['user'] = {
+            "id": str(user_id),
+            "username": username,
+            "name": first_name
+        }
+    return event
 
 
 def add_bot_context(command: str = None, chat_type: str = None, message_type: str = None):
@@ -0,0 +1,40 @@
+-- Single round-trip update of the default question schedule
+-- Created: 2025-07-20
+--
+-- Used by /window and /freq: ensures the user has an active default question
+-- (creating it with the standard defaults if missing) and updates its schedule,
+-- replacing three sequential client-side queries with one RPC call.
+
+CREATE OR REPLACE FUNCTION ensure_and_update_default_question(
+    p_user_id BIGINT,
+    p_window_start TIME DEFAULT NULL,
+    p_window_end TIME DEFAULT NULL,
+    p_interval_minutes INTEGER DEFAULT NULL
+)
+RETURNS SETOF user_questions
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    -- Create default question if missing
+    INSERT INTO user_questions (user_id, question_name, question_text, is_default, active)
+    SELECT p_user_id, 'Основной', '⏰ Время отчёта! Что делаешь?', true, true
+    WHERE NOT EXISTS (
+        SELECT 1 FROM user_questions
+        WHERE user_id = p_user_id AND is_default = true AND active = true
+    );
+
+    -- Update only the provided schedule fields
+    RETURN QUERY
+    UPDATE user_questions
+    SET window_start = COALESCE(p_window_start, window_start),
+        window_end = COALESCE(p_window_end, window_end),
+        interval_minutes = COALESCE(p_interval_minutes, interval_minutes)
+    WHERE user_id = p_user_id AND is_default = true AND active = true
+    RETURNING *;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION ensure_and_update_default_question(BIGINT, TIME, TIME, INTEGER) TO anon;
+
+COMMENT ON FUNCTION ensure_and_update_default_question(BIGINT, TIME, TIME, INTEGER) IS 'Ensure default question exists and update its schedule in one call';
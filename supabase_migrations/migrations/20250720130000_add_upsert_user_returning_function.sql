@@ -0,0 +1,39 @@
+-- Single round-trip user registration for /start
+-- Created: 2025-07-20
+--
+-- Inserts the user with the standard default settings, or refreshes the
+-- Telegram profile fields of an existing user, and returns the stored row.
+-- Replaces the client-side select-then-insert sequence.
+
+CREATE OR REPLACE FUNCTION upsert_user_returning(
+    p_tg_id BIGINT,
+    p_username TEXT DEFAULT NULL,
+    p_first_name TEXT DEFAULT NULL,
+    p_last_name TEXT DEFAULT NULL,
+    p_language VARCHAR(5) DEFAULT 'ru'
+)
+RETURNS SETOF users
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    RETURN QUERY
+    INSERT INTO users (
+        tg_id, tg_username, tg_first_name, tg_last_name,
+        enabled, window_start, window_end, interval_min, language
+    )
+    VALUES (
+        p_tg_id, p_username, p_first_name, p_last_name,
+        true, '09:00:00', '23:00:00', 60, p_language
+    )
+    ON CONFLICT (tg_id) DO UPDATE
+    SET tg_username = EXCLUDED.tg_username,
+        tg_first_name = EXCLUDED.tg_first_name,
+        tg_last_name = EXCLUDED.tg_last_name
+    RETURNING *;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION upsert_user_returning(BIGINT, TEXT, TEXT, TEXT, VARCHAR) TO anon;
+
+COMMENT ON FUNCTION upsert_user_returning(BIGINT, TEXT, TEXT, TEXT, VARCHAR) IS 'Register user or refresh profile fields and return the row in one call';
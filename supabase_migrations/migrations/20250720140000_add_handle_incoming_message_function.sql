@@ -0,0 +1,70 @@
+-- Single round-trip preparation of an incoming activity message
+-- Created: 2025-07-20
+--
+-- Used by the text message handler: registers the user if missing, ensures
+-- an active default question exists, and picks the question the message
+-- answers (a still-valid notification it replies to, otherwise the default
+-- question). Returns the question together with its text so the reply can
+-- be built without another query. Replaces four sequential client-side
+-- round trips.
+
+CREATE OR REPLACE FUNCTION handle_incoming_message(
+    p_tg_id BIGINT,
+    p_username TEXT DEFAULT NULL,
+    p_first_name TEXT DEFAULT NULL,
+    p_last_name TEXT DEFAULT NULL,
+    p_reply_to_message_id BIGINT DEFAULT NULL
+)
+RETURNS TABLE (question_id BIGINT, status TEXT, question_text TEXT)
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    -- Register user with the standard defaults; existing users are left untouched
+    INSERT INTO users (
+        tg_id, tg_username, tg_first_name, tg_last_name,
+        enabled, window_start, window_end, interval_min, language
+    )
+    VALUES (
+        p_tg_id, p_username, p_first_name, p_last_name,
+        true, '09:00:00', '23:00:00', 60, 'ru'
+    )
+    ON CONFLICT (tg_id) DO NOTHING;
+
+    -- Create default question if missing
+    INSERT INTO user_questions (user_id, question_name, question_text, is_default, active)
+    SELECT p_tg_id, 'Основной', '⏰ Время отчёта! Что делаешь?', true, true
+    WHERE NOT EXISTS (
+        SELECT 1 FROM user_questions uq
+        WHERE uq.user_id = p_tg_id AND uq.is_default = true AND uq.active = true
+    );
+
+    -- Reply to a notification that has not expired yet
+    IF p_reply_to_message_id IS NOT NULL THEN
+        RETURN QUERY
+        SELECT qn.question_id, 'reply_success'::TEXT, uq.question_text
+        FROM question_notifications qn
+        JOIN user_questions uq ON uq.id = qn.question_id
+        WHERE qn.user_id = p_tg_id
+          AND qn.telegram_message_id = p_reply_to_message_id
+          AND qn.expires_at > NOW()
+        ORDER BY qn.sent_at DESC
+        LIMIT 1;
+
+        IF FOUND THEN
+            RETURN;
+        END IF;
+    END IF;
+
+    -- Otherwise the message answers the default question
+    RETURN QUERY
+    SELECT uq.id, 'default_question'::TEXT, uq.question_text
+    FROM user_questions uq
+    WHERE uq.user_id = p_tg_id AND uq.is_default = true AND uq.active = true
+    LIMIT 1;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION handle_incoming_message(BIGINT, TEXT, TEXT, TEXT, BIGINT) TO anon;
+
+COMMENT ON FUNCTION handle_incoming_message(BIGINT, TEXT, TEXT, TEXT, BIGINT) IS 'Register user, ensure default question and resolve the answered question in one call';
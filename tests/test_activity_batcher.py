@@ -0,0 +1,74 @@
+"""
+Tests for batched activity logging.
+"""
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from bot.database.activity_batcher import ActivityBatcher
+
+
+class TestActivityBatcher:
+    """Tests for ActivityBatcher."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_logs_share_one_insert(self):
+        """Test that activities logged together are written in a single insert."""
+        db_client = MagicMock()
+        batcher = ActivityBatcher(db_client, flush_interval=0.01)
+        
+        results = await asyncio.gather(
+            batcher.log(1, "first", question_id=10),
+            batcher.log(2, "second"),
+            batcher.log(3, "third", question_id=30),
+        )
+        
+        assert results == [True, True, True]
+        db_client.table.return_value.insert.assert_called_once()
+        rows = db_client.table.return_value.insert.call_args[0][0]
+        assert [row["tg_id"] for row in rows] == [1, 2, 3]
+        assert rows[0]["question_id"] == 10
+        assert "question_id" not in rows[1]
+    
+    @pytest.mark.asyncio
+    async def test_full_batch_flushes_immediately(self):
+        """Test that reaching max_batch_size flushes without waiting."""
+        db_client = MagicMock()
+        batcher = ActivityBatcher(db_client, max_batch_size=2, flush_interval=60)
+        
+        results = await asyncio.wait_for(
+            asyncio.gather(batcher.log(1, "a"), batcher.log(2, "b")),
+            timeout=1
+        )
+        
+        assert results == [True, True]
+    
+    @pytest.mark.asyncio
+    async def test_failed_insert_reports_failure(self):
+        """Test that every caller in a failed batch gets False."""
+        db_client = MagicMock()
+        db_client.table.return_value.insert.return_value.execute.side_effect = Exception("db down")
+        batcher = ActivityBatcher(db_client, flush_interval=0.01)
+        
+        results = await asyncio.gather(batcher.log(1, "a"), batcher.log(2, "b"))
+        
+        assert results == [False, False]
+    
+    @pytest.mark.asyncio
+    async def test_bad_row_fails_only_its_caller(self):
+        """Test that a failed batch is retried row by row."""
+        db_client = MagicMock()
+        
+        def insert(rows):
+            query = MagicMock()
+            if isinstance(rows, list) or rows["tg_id"] == 2:
+                query.execute.side_effect = Exception("violates foreign key constraint")
+            return query
+        
+        db_client.table.return_value.insert.side_effect = insert
+        batcher = ActivityBatcher(db_client, flush_interval=0.01)
+        
+        results = await asyncio.gather(batcher.log(1, "a"), batcher.log(2, "b"), batcher.log(3, "c"))
+        
+        assert results == [True, False, True]
@@ -1,6 +1,7 @@
 """
 Handler integration tests that should have caught the bugs.
 """
+import asyncio
 import os
 import sys
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -71,6 +72,19 @@ class TestHandlerIntegration:
         for expected in expected_handlers:
             assert expected in callback_data_values, f"Missing handler for {expected}"
 
+    def test_main_menu_is_shared_per_language(self):
+        """Test that main menu markup is built once per (is_admin, language)."""
+        from bot.i18n import get_language_translator
+        from bot.keyboards.keyboard_generators import create_main_menu
+
+        en = get_language_translator("en")
+        assert create_main_menu(False, en) is create_main_menu(False, en)
+        assert create_main_menu(True, en) is not create_main_menu(False, en)
+        assert create_main_menu(False, en) is not create_main_menu(False)
+
+        admin_data = [row[0].callback_data for row in create_main_menu(True, en).inline_keyboard]
+        assert "menu_admin" in admin_data
+
     @pytest.mark.asyncio 
     async def test_message_handler_registration(self):
         """Test that message handlers are properly registered."""
@@ -172,6 +186,7 @@ class TestHandlerIntegration:
         from bot.config import Config
         from bot.database.client import DatabaseClient
         from bot.handlers.message_handlers import handle_text_message
+        from bot.questions import QuestionManager
 
         # Create mock objects
         user = User(id=123456789, is_bot=False, first_name="Test", username="testuser")
@@ -187,35 +202,176 @@ class TestHandlerIntegration:
         # Mock bot_data
         with patch('bot.database.client.create_client'):
             config = Config.from_env()
+            db_client = MagicMock(spec=DatabaseClient)
+            user_cache = MagicMock(spec=TTLCache)
+            
+            # handle_incoming_message function not deployed: separate queries are used
+            db_client.client.rpc.side_effect = Exception("function handle_incoming_message does not exist")
+            
+            # Mock user operations
+            mock_user_ops = AsyncMock()
+            mock_user_ops.ensure_user_exists.return_value = {"id": 123456789}
+            mock_user_ops.log_activity.return_value = True
+            
             context.bot_data = {
                 'config': config,
-                'db_client': MagicMock(spec=DatabaseClient),
-                'user_cache': MagicMock(spec=TTLCache)
+                'db_client': db_client,
+                'user_cache': user_cache,
+                'user_ops': mock_user_ops,
+                'question_manager': QuestionManager(db_client, user_cache)
             }
             
-            # Mock user operations
-            with patch('bot.database.user_operations.UserOperations') as mock_user_ops_class:
-                mock_user_ops = AsyncMock()
-                mock_user_ops.ensure_user_exists.return_value = {"id": 123456789}
-                mock_user_ops.log_activity.return_value = True
-                mock_user_ops_class.return_value = mock_user_ops
-                
-                # Call handler
-                await handle_text_message(update, context)
-                
-                # Verify user was registered
-                mock_user_ops.ensure_user_exists.assert_called_once_with(
-                    tg_id=123456789,
-                    username="testuser", 
-                    first_name="Test",
-                    last_name=None
-                )
-                
-                # Verify activity was logged (with question_id parameter)
-                mock_user_ops.log_activity.assert_called_once()
-                args, kwargs = mock_user_ops.log_activity.call_args
-                assert args == (123456789, "This is my activity")
-                assert 'question_id' in kwargs
+            # Call handler
+            await handle_text_message(update, context)
+            
+            # Verify user was registered
+            mock_user_ops.ensure_user_exists.assert_called_once_with(
+                tg_id=123456789,
+                username="testuser", 
+                first_name="Test",
+                last_name=None
+            )
+            
+            # Verify activity was logged (with question_id parameter)
+            mock_user_ops.log_activity.assert_called_once()
+            args, kwargs = mock_user_ops.log_activity.call_args
+            assert args == (123456789, "This is my activity")
+            assert 'question_id' in kwargs
+
+    @pytest.mark.asyncio
+    async def test_message_activity_logging_single_round_trip(self):
+        """Test that the combined database function replaces the separate lookups."""
+        from telegram import Message, Update, User
+        from telegram.ext import ContextTypes
+
+        from bot.cache.ttl_cache import TTLCache
+        from bot.handlers import message_handlers
+        from bot.handlers.message_handlers import handle_text_message
+
+        user = User(id=123456789, is_bot=False, first_name="Test", username="testuser")
+        message = MagicMock(spec=Message)
+        message.text = "This is my activity"
+        message.reply_to_message = None
+        message.reply_text = AsyncMock()
+
+        update = MagicMock(spec=Update)
+        update.effective_user = user
+        update.message = message
+
+        config = MagicMock()
+        config.is_feedback_enabled.return_value = False
+        config.max_activity_length = 2000
+        user_ops = AsyncMock()
+        user_ops.log_activity.return_value = True
+        question_manager = AsyncMock()
+        question_manager.question_ops.handle_incoming_message.return_value = {
+            'question_id': 42, 'status': 'default_question', 'question_text': 'What are you doing?'
+        }
+
+        context = MagicMock(spec=ContextTypes.DEFAULT_TYPE)
+        context.bot_data = {
+            'config': config,
+            'db_client': MagicMock(),
+            'user_cache': TTLCache(),
+            'user_ops': user_ops,
+            'question_manager': question_manager
+        }
+
+        await handle_text_message(update, context)
+        await asyncio.gather(*message_handlers._pending_replies)
+
+        question_manager.question_ops.handle_incoming_message.assert_called_once_with(
+            123456789, "testuser", "Test", None, None
+        )
+        user_ops.ensure_user_exists.assert_not_called()
+        question_manager.determine_question_for_message.assert_not_called()
+        question_manager.question_ops.get_question_by_id.assert_not_called()
+        user_ops.log_activity.assert_called_once_with(123456789, "This is my activity", question_id=42)
+        assert "What are you doing?" in message.reply_text.call_args.args[0]
+
+    @pytest.mark.asyncio
+    async def test_message_without_feedback_session_skips_feedback_handler(self):
+        """Test that feedback handling is skipped when the user has no open session."""
+        from telegram import Message, Update, User
+        from telegram.ext import ContextTypes
+
+        from bot.cache.ttl_cache import TTLCache
+        from bot.handlers.message_handlers import handle_text_message
+
+        user = User(id=123456789, is_bot=False, first_name="Test", username="testuser")
+        message = MagicMock(spec=Message)
+        message.text = "This is my activity"
+        message.reply_text = AsyncMock()
+
+        update = MagicMock(spec=Update)
+        update.effective_user = user
+        update.message = message
+
+        config = MagicMock()
+        config.is_feedback_enabled.return_value = True
+        config.max_activity_length = 2000
+        question_manager = AsyncMock()
+        question_manager.question_ops.handle_incoming_message.return_value = None
+        question_manager.determine_question_for_message.return_value = (None, "no_question")
+
+        context = MagicMock(spec=ContextTypes.DEFAULT_TYPE)
+        context.bot_data = {
+            'config': config,
+            'db_client': MagicMock(),
+            'user_cache': TTLCache(),
+            'user_ops': AsyncMock(),
+            'question_manager': question_manager
+        }
+
+        feedback_module = MagicMock()
+        feedback_module.handle_feedback_message = AsyncMock()
+        with patch.dict(sys.modules, {'bot.handlers.feedback_handlers': feedback_module}):
+            await handle_text_message(update, context)
+
+        feedback_module.handle_feedback_message.assert_not_called()
+        question_manager.determine_question_for_message.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_overlong_message_is_rejected_before_database(self):
+        """Test that messages over the configured length never reach the database."""
+        from telegram import Message, Update, User
+        from telegram.ext import ContextTypes
+
+        from bot.cache.ttl_cache import TTLCache
+        from bot.handlers import message_handlers
+        from bot.handlers.message_handlers import handle_text_message
+
+        user = User(id=123456789, is_bot=False, first_name="Test", username="testuser")
+        message = MagicMock(spec=Message)
+        message.text = "x" * 21
+        message.reply_text = AsyncMock()
+
+        update = MagicMock(spec=Update)
+        update.effective_user = user
+        update.message = message
+
+        config = MagicMock()
+        config.is_feedback_enabled.return_value = False
+        config.max_activity_length = 20
+        user_ops = AsyncMock()
+        question_manager = AsyncMock()
+
+        context = MagicMock(spec=ContextTypes.DEFAULT_TYPE)
+        context.bot_data = {
+            'config': config,
+            'db_client': MagicMock(),
+            'user_cache': TTLCache(),
+            'user_ops': user_ops,
+            'question_manager': question_manager
+        }
+
+        await handle_text_message(update, context)
+        await asyncio.gather(*message_handlers._pending_replies)
+
+        assert context.bot_data['db_client'].method_calls == []
+        question_manager.question_ops.handle_incoming_message.assert_not_called()
+        user_ops.log_activity.assert_not_called()
+        assert "20" in message.reply_text.call_args.args[0]
 
     @pytest.mark.asyncio
     async def test_command_exclusion_from_activity_logging(self):
@@ -0,0 +1,53 @@
+"""
+Tests for HealthService result caching.
+"""
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from bot.services.health_service import HealthService
+
+
+def make_service():
+    """Create HealthService with a connected mock database client."""
+    db_client = MagicMock()
+    db_client.is_connected.return_value = True
+    db_client.table.return_value.select.return_value.limit.return_value.execute.return_value.data = []
+    return HealthService(db_client, "test")
+
+
+class TestCachedSystemHealth:
+    """Tests for get_cached_system_health."""
+    
+    @pytest.mark.asyncio
+    async def test_reuses_recent_result(self):
+        """Test that a fresh result is returned without re-running checks."""
+        service = make_service()
+        
+        first = await service.get_cached_system_health()
+        second = await service.get_cached_system_health()
+        
+        assert first is second
+        assert service.db_client.table.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_expired_result_is_refreshed(self):
+        """Test that checks run again once the result is older than max age."""
+        service = make_service()
+        
+        first = await service.get_cached_system_health(max_age_seconds=0)
+        second = await service.get_cached_system_health(max_age_seconds=0)
+        
+        assert first is not second
+        assert service.db_client.table.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_check(self):
+        """Test that concurrent callers wait for the same health check."""
+        service = make_service()
+        
+        results = await asyncio.gather(*(service.get_cached_system_health() for _ in range(5)))
+        
+        assert all(result is results[0] for result in results)
+        assert service.db_client.table.call_count == 1
@@ -28,6 +28,12 @@ class TestLanguageDetector:
         result = LanguageDetector.detect_from_telegram_user(user)
         assert result == "es"
     
+    def test_detect_ignores_language_code_case(self):
+        """Test detection of a locale sent in unusual case."""
+        user = User(id=123, is_bot=False, first_name="Test", language_code="ES-mx")
+        result = LanguageDetector.detect_from_telegram_user(user)
+        assert result == "es"
+    
     def test_detect_unsupported_language_fallback(self):
         """Test fallback to default for unsupported language."""
         user = User(id=123, is_bot=False, first_name="Test", language_code="fr")
@@ -124,6 +130,57 @@ class TestTranslator:
         result = translator.translate("nonexistent.key")
         assert result == "nonexistent.key"  # Should return the key itself
     
+    def test_repeated_translation_uses_resolved_template(self):
+        """Test that repeated lookups reuse the resolved template."""
+        translator = Translator()
+        translator.set_language("en")
+        
+        first = translator.translate("welcome.greeting", name="Ann")
+        translator._translations = {}  # Resolved templates no longer need the dictionaries
+        second = translator.translate("welcome.greeting", name="Bob")
+        
+        assert "Ann" in first
+        assert "Bob" in second
+        assert first.replace("Ann", "Bob") == second
+    
+    def test_translate_formats_unhashable_arguments(self):
+        """Test that template variables that cannot be cached are still applied."""
+        translator = Translator()
+        translator.set_language("en")
+        
+        cached = translator.translate("welcome.greeting", name="Ann")
+        uncached = translator.translate("welcome.greeting", name=["Ann"])
+        
+        assert cached == translator.translate("welcome.greeting", name="Ann")
+        assert "['Ann']" in uncached
+    
+    def test_translate_keeps_equal_numbers_of_different_types_apart(self):
+        """Test that 1, 1.0 and True are not served from each other's cache entry."""
+        translator = Translator()
+        translator.set_language("en")
+        
+        assert "True" in translator.translate("welcome.greeting", name=True)
+        assert "1.0" in translator.translate("welcome.greeting", name=1.0)
+        result = translator.translate("welcome.greeting", name=1)
+        assert "1.0" not in result and "True" not in result
+    
+    def test_catalog_is_flattened_to_dot_keys(self):
+        """Test that nested catalog sections resolve through dot keys."""
+        translator = Translator()
+        
+        assert translator._get_translation("menu.settings", "en") is not None
+        assert translator._get_translation("menu", "en") is None  # Sections are not strings
+    
+    def test_locales_load_on_first_use(self):
+        """Test that only the default language is parsed up front."""
+        translator = Translator()
+        
+        assert list(translator._translations) == ["ru"]
+        assert "es" in translator.get_available_languages()
+        
+        translator.translate("menu.settings", language="es")
+        assert "es" in translator._translations
+    
     def test_get_available_languages(self):
         """Test getting available languages."""
         translator = Translator()
@@ -179,6 +236,18 @@ class TestGlobalTranslator:
         assert result is not None
         assert len(result) > 0
     
+    def test_language_translator_is_cached_and_isolated(self):
+        """Test per-language translators are reused and leave the global one untouched."""
+        from bot.i18n import get_language_translator
+        
+        global_language = get_translator().current_language
+        en_translator = get_language_translator("en")
+        
+        assert en_translator is get_language_translator("en")
+        assert en_translator.current_language == "en"
+        assert get_language_translator("es").current_language == "es"
+        assert get_translator().current_language == global_language
+    
     def test_detect_user_language_function(self):
         """Test user language detection function."""
         user = User(id=123, is_bot=False, first_name="Test", language_code="en")
@@ -0,0 +1,73 @@
+"""
+Tests for QuestionManager default question helpers.
+"""
+from unittest.mock import AsyncMock
+
+import pytest
+
+from bot.cache.ttl_cache import TTLCache
+from bot.questions.question_manager import QuestionManager
+
+
+def make_manager(cache=None):
+    """Create QuestionManager with mocked question operations."""
+    manager = QuestionManager(db_client=None, cache=cache)
+    manager.question_ops = AsyncMock()
+    return manager
+
+
+class TestDefaultQuestionId:
+    """Tests for get_default_question_id."""
+    
+    @pytest.mark.asyncio
+    async def test_cached_id_skips_database(self):
+        """Test that a cached ID is returned without queries."""
+        cache = TTLCache()
+        await cache.set("default_question_id_123", 42)
+        manager = make_manager(cache)
+        
+        assert await manager.get_default_question_id(123) == 42
+        manager.question_ops.get_active_default_question.assert_not_called()
+        await cache.stop()
+    
+    @pytest.mark.asyncio
+    async def test_id_is_cached_after_lookup(self):
+        """Test that the looked-up ID is stored in cache."""
+        cache = TTLCache()
+        manager = make_manager(cache)
+        manager.question_ops.get_active_default_question.return_value = {"id": 7}
+        
+        assert await manager.get_default_question_id(123) == 7
+        assert await cache.get("default_question_id_123") == 7
+        await cache.stop()
+
+
+class TestUpsertDefaultQuestionSchedule:
+    """Tests for upsert_default_question_schedule."""
+    
+    @pytest.mark.asyncio
+    async def test_single_rpc_call(self):
+        """Test that the server-side function is used when available."""
+        manager = make_manager()
+        manager.question_ops.ensure_and_update_default_question.return_value = {"id": 5}
+        
+        assert await manager.upsert_default_question_schedule(123, interval_minutes=60) is True
+        manager.question_ops.ensure_and_update_default_question.assert_called_once_with(123, None, None, 60)
+        manager.question_ops.update_question.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_fallback_updates_only_provided_fields(self):
+        """Test fallback path when the server-side function is unavailable."""
+        manager = make_manager()
+        manager.question_ops.ensure_and_update_default_question.return_value = None
+        manager.question_ops.get_active_default_question.return_value = {"id": 5}
+        manager.question_ops.update_question.return_value = True
+        
+        result = await manager.upsert_default_question_schedule(
+            123, window_start="09:00:00", window_end="18:00:00"
+        )
+        
+        assert result is True
+        manager.question_ops.update_question.assert_called_once_with(
+            5, {"window_start": "09:00:00", "window_end": "18:00:00"}
+        )
@@ -19,7 +19,15 @@ def track_errors_mock(error_type):
 with patch('monitoring.get_logger'), \
      patch('monitoring.track_errors', track_errors_mock):
     from bot.utils.exceptions import RateLimitExceeded
-    from bot.utils.rate_limiter import MultiTierRateLimiter, RateLimiter, rate_limit
+    from bot.utils.rate_limiter import (
+        MultiTierRateLimiter,
+        NestedTokenBucket,
+        RateLimiter,
+        TokenBucket,
+        concurrent_limit,
+        instrumented_handler,
+        rate_limit,
+    )
 
 
 class TestRateLimiter:
@@ -92,6 +100,70 @@ class TestRateLimiter:
         assert cleaned >= 1
 
 
+class TestTokenBucket:
+    """Tests for TokenBucket class."""
+    
+    def test_allows_burst_up_to_capacity(self):
+        """Test that a full bucket admits a burst of capacity requests."""
+        bucket = TokenBucket(capacity=3, refill_rate=0.01)
+        
+        assert all(bucket.try_consume() for _ in range(3))
+        assert bucket.try_consume() is False
+    
+    def test_refills_over_time(self):
+        """Test that tokens are refilled based on elapsed time."""
+        bucket = TokenBucket(capacity=2, refill_rate=1.0)
+        bucket.try_consume()
+        bucket.try_consume()
+        
+        # Pretend one second has passed
+        bucket.last_refill -= 1.0
+        
+        assert bucket.try_consume() is True
+        assert bucket.try_consume() is False
+    
+    def test_retry_after(self):
+        """Test retry_after reflects refill rate."""
+        bucket = TokenBucket(capacity=1, refill_rate=0.1)
+        bucket.try_consume()
+        
+        assert bucket.retry_after() == 10
+
+
+class TestNestedTokenBucket:
+    """Tests for NestedTokenBucket class."""
+    
+    def test_parent_limits_children(self):
+        """Test that an exhausted parent blocks every child bucket."""
+        parent = NestedTokenBucket(capacity=2, refill_rate=0.01)
+        chats = [NestedTokenBucket(capacity=1, refill_rate=0.01, parent=parent) for _ in range(3)]
+        
+        assert chats[0].try_consume() is True
+        assert chats[1].try_consume() is True
+        assert chats[2].try_consume() is False
+        
+        # Child token is not spent when the parent rejects
+        assert chats[2].tokens == 1
+    
+    def test_child_limits_itself(self):
+        """Test that a child bucket enforces its own capacity."""
+        parent = NestedTokenBucket(capacity=30, refill_rate=30)
+        chat = NestedTokenBucket(capacity=1, refill_rate=0.01, parent=parent)
+        
+        assert chat.try_consume() is True
+        assert chat.try_consume() is False
+        assert parent.tokens >= 28
+    
+    @pytest.mark.asyncio
+    async def test_acquire_waits_for_refill(self):
+        """Test that acquire() waits until a token is available."""
+        bucket = NestedTokenBucket(capacity=1, refill_rate=100)
+        await bucket.acquire()
+        await bucket.acquire()  # Refills within ~10ms
+        
+        assert bucket.tokens < 1
+
+
 class TestMultiTierRateLimiter:
     """Tests for MultiTierRateLimiter class."""
     
@@ -125,6 +197,34 @@ class TestMultiTierRateLimiter:
         is_allowed, _ = await limiter.check_limit(123, "unknown_action")
         assert is_allowed is True
     
+    def test_try_consume_short_circuits(self):
+        """Test that the token-bucket gate rejects once the tier is exhausted."""
+        limiter = MultiTierRateLimiter()
+        
+        for _ in range(5):  # friend_request tier allows 5 per hour
+            is_allowed, retry_after = limiter.try_consume(123, "friend_request")
+            assert is_allowed is True
+            assert retry_after is None
+        
+        is_allowed, retry_after = limiter.try_consume(123, "friend_request")
+        assert is_allowed is False
+        assert retry_after >= 1
+        
+        # Other users are unaffected
+        is_allowed, _ = limiter.try_consume(456, "friend_request")
+        assert is_allowed is True
+    
+    def test_set_limit_replaces_tier_and_buckets(self):
+        """Test that reconfiguring a tier applies to the fast gate as well."""
+        limiter = MultiTierRateLimiter()
+        limiter.try_consume(123, "feedback")
+        
+        limiter.set_limit("feedback", 1, window_seconds=3600)
+        
+        assert limiter.limiters["feedback"].max_requests == 1
+        assert limiter.try_consume(123, "feedback")[0] is True
+        assert limiter.try_consume(123, "feedback")[0] is False
+    
     def test_get_usage_stats(self):
         """Test usage statistics for multi-tier limiter."""
         limiter = MultiTierRateLimiter()
@@ -206,6 +306,63 @@ class TestRateLimitDecorator:
         assert result == "User ID: 456"
 
 
+class TestConcurrentLimitDecorator:
+    """Tests for concurrent_limit decorator."""
+    
+    @pytest.mark.asyncio
+    async def test_rejects_calls_over_concurrency_cap(self):
+        """Test that a user cannot exceed the in-flight cap while others can proceed."""
+        release = asyncio.Event()
+        
+        @concurrent_limit(action="test_concurrency", max_concurrent=1)
+        async def slow_function(user_id: int):
+            await release.wait()
+            return user_id
+        
+        first = asyncio.create_task(slow_function(user_id=123))
+        await asyncio.sleep(0)
+        
+        with pytest.raises(RateLimitExceeded) as exc_info:
+            await slow_function(user_id=123)
+        assert exc_info.value.action == "test_concurrency"
+        
+        other = asyncio.create_task(slow_function(user_id=456))
+        release.set()
+        assert await first == 123
+        assert await other == 456
+        
+        # Slot is released once the call finishes
+        assert await slow_function(user_id=123) == 123
+
+
+class TestInstrumentedHandlerDecorator:
+    """Tests for instrumented_handler decorator."""
+    
+    @pytest.mark.asyncio
+    async def test_runs_handler_until_limit_then_raises(self):
+        """Test that the combined decorator passes through and enforces the tier."""
+        @instrumented_handler("test_instrumented", action="friend_request")
+        async def handler(user_id: int):
+            return user_id
+        
+        for _ in range(5):  # friend_request tier allows 5 per hour
+            assert await handler(user_id=777) == 777
+        
+        with pytest.raises(RateLimitExceeded) as exc_info:
+            await handler(user_id=777)
+        assert exc_info.value.action == "friend_request"
+    
+    @pytest.mark.asyncio
+    async def test_reraises_handler_errors(self):
+        """Test that handler exceptions propagate after being reported."""
+        @instrumented_handler("test_instrumented_error")
+        async def handler(user_id: int):
+            raise ValueError("boom")
+        
+        with pytest.raises(ValueError):
+            await handler(user_id=778)
+
+
 class TestRateLimiterIntegration:
     """Integration tests for rate limiting system."""
     
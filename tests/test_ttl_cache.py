@@ -0,0 +1,51 @@
+"""
+Tests for TTLCache eviction and statistics.
+"""
+import pytest
+
+from bot.cache.ttl_cache import TTLCache
+
+
+class TestTTLCache:
+    """Tests for TTLCache."""
+    
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self):
+        """Test that the least recently used entry is evicted at capacity."""
+        cache = TTLCache(max_size=2)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        
+        # Touch "a" so "b" becomes least recently used
+        assert await cache.get("a") == 1
+        await cache.set("c", 3)
+        
+        assert await cache.get("b") is None
+        assert await cache.get("a") == 1
+        assert await cache.get("c") == 3
+        await cache.stop()
+    
+    @pytest.mark.asyncio
+    async def test_tracks_hit_rate(self):
+        """Test that hits and misses are reported in stats."""
+        cache = TTLCache()
+        await cache.set("a", 1)
+        await cache.get("a")
+        await cache.get("missing")
+        
+        stats = await cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        await cache.stop()
+    
+    @pytest.mark.asyncio
+    async def test_accepts_tuple_keys(self):
+        """Test that tuple keys work and stay distinct from similar string keys."""
+        cache = TTLCache()
+        await cache.set(("feedback_session", 123), {"status": "awaiting_description"})
+        
+        assert await cache.get(("feedback_session", 123)) == {"status": "awaiting_description"}
+        assert await cache.get("feedback_session_123") is None
+        assert await cache.invalidate(("feedback_session", 123)) is True
+        await cache.stop()